@@ -1,12 +1,59 @@
-from fastapi import APIRouter
-from fastapi.responses import FileResponse
+import os
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+from ..core.config import STATIC_DIR
+from ..core.metrics import (
+    ACTIVE_CONNECTIONS,
+    POOL_CHECKOUTS,
+    POOL_IDLE_SESSIONS,
+    REJECTED_CONNECTIONS,
+    render_metrics,
+)
+from ..utils.static_files import StaticPage
 
 router = APIRouter()
 
+index_page = StaticPage(os.path.join(STATIC_DIR, "index.html"))
+about = StaticPage(os.path.join(STATIC_DIR, "about.html"))
+# Served from the root so the worker's scope covers the whole site
+service_worker = StaticPage(os.path.join(STATIC_DIR, "sw.js"))
+
 @router.get("/")
-async def read_root():
-    return FileResponse("static/index.html")
+async def read_root(request: Request):
+    return index_page.response(request)
 
 @router.get("/about")
-async def about_page():
-    return FileResponse("static/about.html")
\ No newline at end of file
+async def about_page(request: Request):
+    return about.response(request)
+
+@router.get("/sw.js")
+async def service_worker_script(request: Request):
+    return service_worker.response(request)
+
+@router.get("/stats")
+async def stats(request: Request):
+    response_cache = request.app.state.response_cache
+    tts_cache = request.app.state.tts_cache
+    return {
+        "connections": request.app.state.registry.stats(),
+        "session_pool": request.app.state.session_pool.stats(),
+        "response_cache": response_cache.stats() if response_cache is not None else None,
+        "tts": {
+            "session_pool": request.app.state.tts_pool.stats(),
+            "cache": tts_cache.stats() if tts_cache is not None else None,
+        },
+    }
+
+
+@router.get("/metrics")
+async def metrics(request: Request):
+    """Prometheus scrape endpoint for this worker process."""
+    connections = request.app.state.registry.stats()
+    ACTIVE_CONNECTIONS.set(connections["active"])
+    REJECTED_CONNECTIONS.set(connections["rejected"])
+    pool = request.app.state.session_pool.stats()
+    for lang, idle in pool["idle"].items():
+        POOL_IDLE_SESSIONS.labels(lang).set(idle)
+    for result in ("hits", "misses", "expired"):
+        POOL_CHECKOUTS.labels(result).set(pool[result])
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
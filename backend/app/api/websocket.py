@@ -1,71 +1,173 @@
 import json
 import asyncio
+import uuid
 from contextlib import suppress
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from ..services.connection import ConnectionManager
-from ..core.transalation import SYSTEM_INSTRUCTIONS
-from ..utils.audio_processing import process_audio_input
-from ..utils.image_processing import process_image_input
+from ..utils.audio_processing import decode_pcm, process_audio_input
+from ..utils.image_processing import decode_image_input
 from ..models.input_type import InputType
 from ..services.audio_generator import generate_audio_response
-from ..core.constant import AUDIO_INPUT_SAMPLE_RATE
+from ..utils.frame_codec import decode_frame, dumps, loads
+from ..core.constant import AUDIO_INPUT_SAMPLE_RATE, SAMPLE_RATE
+from ..core.config import logger, FRAME_RATE_CONTROL_ENABLED, RECORD_DIR, RESPONSE_CACHE_ENABLED
+from ..core.log import connection_id, connection_lang
+from ..utils.audio_codec import DownstreamEncoder
+from ..services.recorder import SessionRecorder
+from ..services.response_cache import ResponseCache
 
 router = APIRouter()
 
+# Allowed values for the per-type byte counters' label
+INPUT_TYPES = {input_type.value for input_type in InputType}
+
+async def dispatch_input(manager: ConnectionManager, input_type, data,
+                         sample_rate: int = AUDIO_INPUT_SAMPLE_RATE):
+    """Process a single client input and queue it for Gemini."""
+    if not data:
+        return
+    if input_type == InputType.TEXT:
+        # The turn is about the frame being held, if any
+        await manager.burst.flush()
+        manager.input_queue.put(InputType.TEXT, data)
+    elif input_type == InputType.AUDIO:
+        if sample_rate == AUDIO_INPUT_SAMPLE_RATE and manager.vad is None:
+            processed = await process_audio_input(data)
+            manager.input_queue.put(InputType.AUDIO, processed)
+            return
+        samples = decode_pcm(data)
+        if sample_rate != AUDIO_INPUT_SAMPLE_RATE:
+            samples = manager.resample(samples, sample_rate)
+            if not len(samples):
+                return
+        if manager.vad is None:
+            chunks, event = [samples], None
+        else:
+            chunks, event = manager.vad.process(samples)
+        for chunk in chunks:
+            processed = await process_audio_input(chunk)
+            manager.input_queue.put(InputType.AUDIO, processed)
+        if event:
+            await manager.on_speech_event(event)
+        if manager.vad is not None and manager.vad.speaking:
+            await manager.check_barge_in()
+    elif input_type == InputType.IMAGE:
+        image_bytes, image_type = await decode_image_input(data)
+        await manager.burst.submit(image_bytes, image_type)
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     lang = websocket.query_params.get("lang", "en")
+    # Tag every log line of this connection, including its send/receive tasks
+    connection_id.set(uuid.uuid4().hex[:8])
+    connection_lang.set(lang)
     manager = ConnectionManager()
-    await manager.connect(websocket)
-    send_task = receive_task = None
+    manager.lang = lang
+    if RESPONSE_CACHE_ENABLED:
+        # Shared per worker process, or private to this connection
+        shared = websocket.app.state.response_cache
+        manager.use_response_cache(shared if shared is not None else ResponseCache())
+    if websocket.query_params.get("mode") == "read":
+        # Text-reading mode: grayscale frames are enough for OCR
+        manager.image_pipeline.grayscale = True
+    try:
+        # Opt-in compressed downstream audio, e.g. ?codec=mulaw&rate=16000
+        manager.downstream = DownstreamEncoder(
+            websocket.query_params.get("codec", "pcm"),
+            int(websocket.query_params.get("rate", SAMPLE_RATE)),
+        )
+    except ValueError as e:
+        logger.warning("Ignoring downstream audio options: %s", e)
+    if websocket.query_params.get("frames") == "1":
+        manager.use_framed_audio()
+    registry = websocket.app.state.registry
+    if not registry.try_admit(manager):
+        # Full or draining: fail fast and tell the client when to come back
+        await websocket.accept()
+        await websocket.send_text(dumps({"error": "busy", "retryAfter": registry.retry_after}))
+        await websocket.close(code=1013)
+        return
+    send_task = receive_task = rate_task = audio_task = None
     try:
-        await websocket.send_json({"status": "connected"})
-        # Prepare Gemini live session
-        from ..core.config import API_KEY, logger
-        from google import genai
-        client = genai.Client(api_key=API_KEY, http_options={"api_version": "v1alpha"})
-        system_instruction = SYSTEM_INSTRUCTIONS.get(lang, SYSTEM_INSTRUCTIONS["en"])
-        config = {"generation_config": {"response_modalities": ["AUDIO"],
-                                         "audio_config": {"audio_encoding": "LINEAR16",
-                                                           "sample_rate_hertz": 24000,
-                                                           "chunk_size": 4096}},
-                  "system_instruction": system_instruction}
-        session_ctx = client.aio.live.connect(model="models/gemini-2.0-flash-exp", config=config)
-        manager.session = await session_ctx.__aenter__()
+        # Admitted from here on: every failure path must reach release()
+        await manager.connect(websocket)
+        if RECORD_DIR:
+            manager.recorder = SessionRecorder.create(RECORD_DIR, {"query": str(websocket.url.query)})
+        audio = manager.downstream.describe()
+        if manager.audio_stream is not None:
+            audio.update(manager.audio_stream.describe())
+            audio_task = asyncio.create_task(manager.audio_stream.run())
+        await websocket.send_text(dumps({"status": "connected", "audio": audio}))
+        # Take a pre-warmed Gemini live session for this language
+        pool = websocket.app.state.session_pool
+        session_key = lang if lang in pool.configs else "en"
+        manager.session_factory = lambda: pool.checkout(session_key)
+        await manager.open_session()
 
         # Start send/receive loops
         send_task = asyncio.create_task(manager.send_realtime())
         receive_task = asyncio.create_task(manager.receive_responses(websocket))
+        if FRAME_RATE_CONTROL_ENABLED:
+            rate_task = asyncio.create_task(manager.control_frame_rate(websocket))
 
         # Main message loop
         while True:
             msg = await websocket.receive()
             if msg["type"] == "websocket.receive":
+                if manager.recorder:
+                    manager.recorder.client_message(msg)
                 try:
-                    data = json.loads(msg.get("text", "{}"))
-                    if data.get("type") == InputType.TEXT and data.get("data"):
-                        await manager.input_queue.put(data["data"])
-                    elif data.get("type") == InputType.AUDIO and data.get("data"):
-                        processed = await process_audio_input(data["data"], AUDIO_INPUT_SAMPLE_RATE)
-                        await manager.input_queue.put(processed)
-                    elif data.get("type") == InputType.IMAGE and data.get("data"):
-                        processed = await process_image_input(data["data"])
-                        await manager.input_queue.put(processed)
+                    if msg.get("bytes") is not None:
+                        # Binary frame: header + raw PCM / image / UTF-8 payload
+                        frame = decode_frame(msg["bytes"])
+                        manager.count_received(frame.type.value, len(msg["bytes"]))
+                        await dispatch_input(manager, frame.type, frame.payload,
+                                             frame.sample_rate or AUDIO_INPUT_SAMPLE_RATE)
+                    else:
+                        # Legacy JSON message with base64 / int-list payloads
+                        data = loads(msg.get("text") or "{}")
+                        if data.get("type") == "turn_cancel_ack":
+                            manager.count_received("control", len(msg.get("text")))
+                            manager.turn_cancel_acked()
+                            continue
+                        kind = data.get("type") if data.get("type") in INPUT_TYPES else "unknown"
+                        manager.count_received(kind, len(msg.get("text") or ""))
+                        await dispatch_input(manager, data.get("type"), data.get("data"),
+                                             int(data.get("sampleRate") or AUDIO_INPUT_SAMPLE_RATE))
                 except json.JSONDecodeError:
-                    await websocket.send_json({"error": "Invalid JSON format"})
+                    await websocket.send_text(dumps({"error": "Invalid JSON format"}))
                 except Exception as e:
-                    await websocket.send_json({"error": str(e)})
+                    await websocket.send_text(dumps({"error": str(e)}))
             elif msg["type"] == "websocket.disconnect":
                 break
     except WebSocketDisconnect:
         pass
     finally:
-        # Cleanup tasks and session
-        for task in (send_task, receive_task):
-            if task:
-                task.cancel()
-                with suppress(Exception): await task
-        if manager.session:
-            with suppress(Exception): await manager.session.close()
-        manager.disconnect()
+        try:
+            # Cleanup tasks and session
+            for task in (send_task, receive_task, rate_task, audio_task):
+                if task:
+                    task.cancel()
+                    # CancelledError is not an Exception; letting it escape here
+                    # would skip the cleanup below
+                    with suppress(asyncio.CancelledError, Exception): await task
+            await manager.close_session()
+            downstream = manager.downstream
+            if not downstream.passthrough:
+                logger.info("Downstream %s@%d: %d -> %d bytes, %.1f ms encoding",
+                            downstream.codec, downstream.sample_rate, downstream.bytes_in,
+                            downstream.bytes_out, downstream.encode_seconds * 1000)
+            logger.info(
+                "Connection totals: %d bytes in, %d bytes out, %d reconnect(s)",
+                manager.bytes_in, manager.bytes_out, manager.reconnects,
+                extra={"bytes_in": manager.bytes_in, "bytes_out": manager.bytes_out,
+                       "reconnects": manager.reconnects},
+            )
+            if manager.recorder:
+                # Waits for the writer thread to drain its queue
+                await asyncio.to_thread(manager.recorder.close)
+            manager.disconnect()
+        finally:
+            # The slot is returned even if cleanup fails or is cancelled
+            registry.release(manager)
         with suppress(Exception): await websocket.close()
\ No newline at end of file
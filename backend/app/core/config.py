@@ -8,9 +8,173 @@ load_dotenv()
 # API key for Gemini
 API_KEY = os.getenv("API_KEY")
 
-# Logging configuration
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Scene-change filter for webcam frames: frames whose perceptual hash is
+# within FRAME_DEDUP_THRESHOLD bits of the last forwarded frame are dropped,
+# but one frame is always forwarded every FRAME_DEDUP_MAX_STALENESS seconds.
+FRAME_DEDUP_ENABLED = os.getenv("FRAME_DEDUP_ENABLED", "1") == "1"
+FRAME_DEDUP_THRESHOLD = int(os.getenv("FRAME_DEDUP_THRESHOLD", "5"))
+FRAME_DEDUP_MAX_STALENESS = float(os.getenv("FRAME_DEDUP_MAX_STALENESS", "5.0"))
+
+# Burst fusion: webcam frames arriving within BURST_WINDOW_MS of each other
+# (a single capture sends three) are treated as one burst. A frame with no
+# other frame in the window before it is forwarded at once; frames following
+# it within the window are held for at most BURST_WINDOW_MS, then the
+# sharpest, best exposed of them is forwarded if it beats that first frame.
+BURST_ENABLED = os.getenv("BURST_ENABLED", "1") == "1"
+BURST_WINDOW_MS = int(os.getenv("BURST_WINDOW_MS", "120"))
+
+# Adaptive webcam frame rate: every FRAME_RATE_UPDATE_MS the server picks a
+# frame interval between FRAME_INTERVAL_MIN_MS and FRAME_INTERVAL_MAX_MS
+# (clients start at FRAME_INTERVAL_MS) and tells the client when it
+# changes. The upstream counts as congested when the average send takes
+# longer than FRAME_RATE_MAX_SEND_MS or more than FRAME_RATE_MAX_QUEUE
+# inputs are waiting.
+FRAME_RATE_CONTROL_ENABLED = os.getenv("FRAME_RATE_CONTROL_ENABLED", "1") == "1"
+FRAME_RATE_UPDATE_MS = int(os.getenv("FRAME_RATE_UPDATE_MS", "1000"))
+FRAME_INTERVAL_MS = int(os.getenv("FRAME_INTERVAL_MS", "500"))
+FRAME_INTERVAL_MIN_MS = int(os.getenv("FRAME_INTERVAL_MIN_MS", "250"))
+FRAME_INTERVAL_MAX_MS = int(os.getenv("FRAME_INTERVAL_MAX_MS", "4000"))
+FRAME_RATE_MAX_SEND_MS = int(os.getenv("FRAME_RATE_MAX_SEND_MS", "300"))
+FRAME_RATE_MAX_QUEUE = int(os.getenv("FRAME_RATE_MAX_QUEUE", "10"))
+
+# Framed downstream audio (opt-in with ?frames=1): model audio is re-chunked
+# into AUDIO_FRAME_MS frames with a sequence number, turn id and timestamp.
+# Clients start playing a reply AUDIO_JITTER_MS after its first frame
+# arrives, and frames are sent at most AUDIO_FRAME_LEAD_MS ahead of when
+# they will be played.
+AUDIO_FRAME_MS = int(os.getenv("AUDIO_FRAME_MS", "40"))
+AUDIO_JITTER_MS = int(os.getenv("AUDIO_JITTER_MS", "80"))
+AUDIO_FRAME_LEAD_MS = int(os.getenv("AUDIO_FRAME_LEAD_MS", "200"))
+
+# Image normalisation: frames are downscaled so the long edge is at most
+# IMAGE_MAX_EDGE pixels and re-encoded as IMAGE_FORMAT (jpeg or webp).
+IMAGE_MAX_EDGE = int(os.getenv("IMAGE_MAX_EDGE", "1024"))
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "jpeg").lower()
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+IMAGE_GRAYSCALE = os.getenv("IMAGE_GRAYSCALE", "0") == "1"
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+# Consecutive audio chunks are coalesced into one upstream message per
+# REALTIME_BATCH_WINDOW_MS (0 sends every chunk on its own).
+REALTIME_BATCH_WINDOW_MS = int(os.getenv("REALTIME_BATCH_WINDOW_MS", "100"))
+
+# Voice activity detection on uplink audio. A 20 ms frame counts as speech
+# when its level is above VAD_ENERGY_THRESHOLD_DB (dBFS) and its
+# zero-crossing rate is below VAD_ZCR_MAX, or when it is 10 dB louder than
+# the threshold. VAD_HANGOVER_MS of trailing silence is still forwarded so
+# Gemini can detect the end of the turn, and VAD_PREROLL_MS of audio before
+# the speech onset is sent along with it.
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1") == "1"
+VAD_ENERGY_THRESHOLD_DB = float(os.getenv("VAD_ENERGY_THRESHOLD_DB", "-45"))
+VAD_ZCR_MAX = float(os.getenv("VAD_ZCR_MAX", "0.25"))
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "800"))
+VAD_PREROLL_MS = int(os.getenv("VAD_PREROLL_MS", "300"))
+
+# Barge-in: speech while the model's reply is still streaming or playing
+# cuts the reply off (queued audio dropped, the client told to stop
+# playback with a turn_cancel message) once it has lasted
+# BARGE_IN_MIN_SPEECH_MS without a break, so a click or cough does not.
+# Needs VAD_ENABLED.
+BARGE_IN_ENABLED = os.getenv("BARGE_IN_ENABLED", "1") == "1"
+BARGE_IN_MIN_SPEECH_MS = int(os.getenv("BARGE_IN_MIN_SPEECH_MS", "200"))
+
+# Pre-warmed Gemini live sessions: SESSION_POOL_SIZE idle sessions are kept
+# open per language (0, the default, disables pre-warming), replaced after
+# SESSION_POOL_MAX_IDLE seconds and health-checked every
+# SESSION_POOL_CHECK_INTERVAL seconds. The pool is per worker process, so a
+# deployment holds SESSION_POOL_SIZE x languages x WEB_CONCURRENCY idle
+# sessions, reopened even with no traffic; size it against the Gemini quota.
+SESSION_POOL_SIZE = int(os.getenv("SESSION_POOL_SIZE", "0"))
+SESSION_POOL_MAX_IDLE = float(os.getenv("SESSION_POOL_MAX_IDLE", "300"))
+SESSION_POOL_CHECK_INTERVAL = float(os.getenv("SESSION_POOL_CHECK_INTERVAL", "15"))
+
+# Text-to-speech (generate_audio_response): live sessions come from their
+# own pool, pre-warmed with TTS_POOL_SIZE sessions (0: the first phrase
+# opens one, which is then kept), and each is reused for up to
+# TTS_SESSION_MAX_USES phrases. Synthesised audio is cached on disk in
+# TTS_CACHE_DIR (empty disables the cache), keyed by text, language and
+# voice, with the least recently used phrases evicted beyond
+# TTS_CACHE_MAX_MB. TTS_VOICE picks a prebuilt Gemini voice; empty uses the
+# model default.
+TTS_VOICE = os.getenv("TTS_VOICE", "")
+TTS_POOL_SIZE = int(os.getenv("TTS_POOL_SIZE", "0"))
+TTS_SESSION_MAX_USES = int(os.getenv("TTS_SESSION_MAX_USES", "20"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", ".cache/tts")
+TTS_CACHE_MAX_MB = float(os.getenv("TTS_CACHE_MAX_MB", "64"))
+
+# Gemini session resumption: after an upstream close, reconnect up to
+# RECONNECT_MAX_ATTEMPTS times with exponential backoff starting at
+# RECONNECT_BASE_DELAY seconds (capped at RECONNECT_MAX_DELAY). While
+# reconnecting at most INPUT_AUDIO_BACKLOG audio chunks are buffered, and
+# the last CONTEXT_TRANSCRIPT_TURNS text turns are replayed afterwards.
+RECONNECT_MAX_ATTEMPTS = int(os.getenv("RECONNECT_MAX_ATTEMPTS", "5"))
+RECONNECT_BASE_DELAY = float(os.getenv("RECONNECT_BASE_DELAY", "0.5"))
+RECONNECT_MAX_DELAY = float(os.getenv("RECONNECT_MAX_DELAY", "8"))
+INPUT_AUDIO_BACKLOG = int(os.getenv("INPUT_AUDIO_BACKLOG", "64"))
+CONTEXT_TRANSCRIPT_TURNS = int(os.getenv("CONTEXT_TRANSCRIPT_TURNS", "6"))
+
+# Admission control: each worker process serves at most MAX_LIVE_SESSIONS
+# live sessions; extra clients are told to retry after
+# ADMISSION_RETRY_AFTER seconds. On SIGTERM a worker stops admitting and
+# waits up to DRAIN_TIMEOUT seconds for active sessions to finish.
+MAX_LIVE_SESSIONS = int(os.getenv("MAX_LIVE_SESSIONS", "50"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "5"))
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", "25"))
+
+# GEMINI_BACKEND=fake swaps the Gemini client for a local stand-in (see
+# services/fake_live.py) so /ws can be load-tested without an API key.
+# The fake answers each user turn after FAKE_RESPONSE_LATENCY_MS with
+# FAKE_REPLY_SECONDS of 24 kHz PCM, and closes a session with 1011 on a
+# FAKE_CLOSE_RATE fraction of turns.
+GEMINI_BACKEND = os.getenv("GEMINI_BACKEND", "google").lower()
+FAKE_CONNECT_LATENCY_MS = int(os.getenv("FAKE_CONNECT_LATENCY_MS", "150"))
+FAKE_RESPONSE_LATENCY_MS = int(os.getenv("FAKE_RESPONSE_LATENCY_MS", "300"))
+FAKE_REPLY_SECONDS = float(os.getenv("FAKE_REPLY_SECONDS", "2"))
+FAKE_CLOSE_RATE = float(os.getenv("FAKE_CLOSE_RATE", "0"))
+
+# Session recording: when RECORD_DIR is set every /ws connection writes its
+# inbound messages and Gemini's responses to RECORD_DIR/<id>.rec (+ .idx)
+# for backend/tools/replay.py. Recordings contain users' audio and camera
+# frames, so only enable this where that is acceptable.
+RECORD_DIR = os.getenv("RECORD_DIR") or None
+
+# Response cache for repeated questions about the same scene: a text turn
+# whose prompt and language match an earlier one, with the current frame
+# within RESPONSE_CACHE_MATCH_BITS of that turn's frame hash, is answered
+# from the cache. A 64-bit hash says little about details (PUSH and PULL on
+# the same door hash alike), so a candidate only hits when no pixel of the
+# two frames' 32x32 grayscale thumbnails differs by more than
+# RESPONSE_CACHE_MAX_PIXEL_DIFF (0-255). Dark, blank or featureless frames
+# (hash 0, or thumbnail standard deviation below RESPONSE_CACHE_MIN_CONTRAST)
+# are never cached or looked up. Entries expire after RESPONSE_CACHE_TTL
+# seconds and the least recently used are evicted beyond
+# RESPONSE_CACHE_MAX_MB. The cache is per connection unless
+# RESPONSE_CACHE_SHARED=1 (one per worker process).
+# Only the general scene-description prompts in RESPONSE_CACHE_PROMPTS
+# ("|"-separated, compared case- and whitespace-insensitively) are cached:
+# a hazard or navigation question must always be answered from the live
+# scene, which a matching frame does not guarantee. Off by default.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "0") == "1"
+RESPONSE_CACHE_SHARED = os.getenv("RESPONSE_CACHE_SHARED", "0") == "1"
+RESPONSE_CACHE_MAX_MB = float(os.getenv("RESPONSE_CACHE_MAX_MB", "16"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_MATCH_BITS = int(os.getenv("RESPONSE_CACHE_MATCH_BITS", "4"))
+RESPONSE_CACHE_MAX_PIXEL_DIFF = int(os.getenv("RESPONSE_CACHE_MAX_PIXEL_DIFF", "16"))
+RESPONSE_CACHE_MIN_CONTRAST = float(os.getenv("RESPONSE_CACHE_MIN_CONTRAST", "10"))
+RESPONSE_CACHE_PROMPTS = os.getenv(
+    "RESPONSE_CACHE_PROMPTS", "explain the image in detail|describe the scene|what do you see"
+).split("|")
+
+# Static site: the output of `python -m backend.tools.build_assets` (hashed,
+# precompressed files) when it exists, otherwise the sources in static/.
+STATIC_DIR = os.getenv("STATIC_DIR") or ("static/dist" if os.path.isdir("static/dist") else "static")
+
+# Logging (see core/log.py): LOG_PROFILE=dev logs DEBUG as text,
+# LOG_PROFILE=production logs INFO as JSON lines. LOG_LEVEL overrides the
+# profile's level. Sampled per-frame debug events are emitted at most once
+# per LOG_SAMPLE_INTERVAL seconds per event.
+LOG_PROFILE = os.getenv("LOG_PROFILE", "dev").lower()
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if LOG_PROFILE == "dev" else "INFO").upper()
+LOG_SAMPLE_INTERVAL = float(os.getenv("LOG_SAMPLE_INTERVAL", "1.0"))
+
 logger = logging.getLogger(__name__)
\ No newline at end of file
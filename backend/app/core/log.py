@@ -0,0 +1,111 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from .config import LOG_LEVEL, LOG_PROFILE, LOG_SAMPLE_INTERVAL
+
+# Per-connection fields, set by the /ws handler. Tasks it creates inherit
+# them, so every log line of a connection carries its id and language.
+connection_id: ContextVar[str] = ContextVar("connection_id", default="-")
+connection_lang: ContextVar[str] = ContextVar("connection_lang", default="-")
+
+# Libraries that log every frame at DEBUG
+QUIET_LOGGERS = ("websockets", "httpcore", "httpx", "hpack", "asyncio")
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(conn)s] %(message)s"
+
+# Attributes every LogRecord has; anything else was passed via `extra`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "conn", "lang"}
+
+class ConnectionFilter(logging.Filter):
+    """Stamp records with the current connection's fields."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.conn = connection_id.get()
+        record.lang = connection_lang.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including per-connection and `extra` fields."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "conn": getattr(record, "conn", "-"),
+            "lang": getattr(record, "lang", "-"),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class LogSampler:
+    """
+    Rate limiter for per-frame debug events: each key is logged at most once
+    per `interval` seconds, with a count of the events skipped in between.
+    """
+    def __init__(self, interval: float = LOG_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._state: Dict[str, Tuple[float, int]] = {}
+
+    def debug(self, logger: logging.Logger, key: str, msg: str, *args):
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        now = time.monotonic()
+        last, skipped = self._state.get(key, (0.0, 0))
+        if now - last < self.interval:
+            self._state[key] = (last, skipped + 1)
+            return
+        self._state[key] = (now, 0)
+        if skipped:
+            msg += " (%d similar suppressed)"
+            args += (skipped,)
+        logger.debug(msg, *args)
+
+sampler = LogSampler()
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def setup_logging(profile: str = LOG_PROFILE, level: str = LOG_LEVEL):
+    """
+    Route all logging through a queue drained by a background thread, so the
+    event loop never blocks on stderr. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if profile == "production" else logging.Formatter(TEXT_FORMAT))
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.addFilter(ConnectionFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(max(logging.INFO, root.level))
+    # uvicorn installs its own synchronous handlers; send them through the queue too
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers[:] = []
+        uvicorn_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging():
+    """Flush queued records and stop the background thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,216 @@
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond queue waits up to
+# multi-second model responses
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        """Return the child for a set of label values, creating it once."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_str(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{value}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in self._children.items():
+            lines.extend(self._render_child(key, child))
+        return lines
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def set(self, value: float):
+        self.value = value
+
+class Counter(_Metric):
+    """Monotonic counter; use labels(...) when labelnames are given."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self._default.value += amount
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{self._label_str(key)} {child.value:g}"]
+
+class Gauge(Counter):
+    """Value that can go up and down, typically set at scrape time."""
+    kind = "gauge"
+
+    def set(self, value: float):
+        self._default.value = value
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram. observe() is a bisect plus three additions so it
+    is cheap enough for per-message hot paths.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def _render_child(self, key, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            labels = self._label_str(key, 'le="' + le + '"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_str(key)} {child.sum:g}")
+        lines.append(f"{self.name}_count{self._label_str(key)} {child.count}")
+        return lines
+
+REGISTRY: List[_Metric] = []
+
+def render_metrics(registry: Optional[List[_Metric]] = None) -> str:
+    """Prometheus text exposition (format 0.0.4) of all registered metrics."""
+    lines = []
+    for metric in REGISTRY if registry is None else registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# Realtime pipeline metrics. They are per process: with several workers
+# each one exposes its own series.
+QUEUE_WAIT = Histogram(
+    "aisight_input_queue_wait_seconds",
+    "Time an input spent in the scheduler before being sent to Gemini",
+    ["type"],
+)
+SEND_DURATION = Histogram(
+    "aisight_gemini_send_seconds",
+    "Duration of session.send calls to the Gemini live API",
+    ["type"],
+)
+TIME_TO_FIRST_AUDIO = Histogram(
+    "aisight_time_to_first_audio_seconds",
+    "Time from the end of a user turn to the first audio byte from Gemini",
+)
+BYTES_RECEIVED = Counter(
+    "aisight_client_bytes_received_total",
+    "Bytes received from clients over the WebSocket",
+    ["type"],
+)
+BYTES_SENT = Counter(
+    "aisight_client_bytes_sent_total",
+    "Bytes sent to clients over the WebSocket",
+    ["type"],
+)
+INPUTS_DISCARDED = Counter(
+    "aisight_inputs_discarded_total",
+    "Inputs not sent to Gemini, by reason",
+    ["reason"],
+)
+AUDIO_FRAME_LATENESS = Histogram(
+    "aisight_audio_frame_lateness_seconds",
+    "How long after its playout time a framed downstream audio frame was sent (late frames only)",
+)
+BARGE_IN_LATENCY = Histogram(
+    "aisight_barge_in_seconds",
+    "Time from speech onset to the reply being cut off, by stage "
+    "(server: turn_cancel sent, client: the client's turn_cancel_ack received)",
+    ["stage"],
+)
+TURN_CANCELS = Counter(
+    "aisight_turn_cancels_total",
+    "Model replies cut off before the end, by cause (barge_in: local VAD, interrupted: Gemini)",
+    ["reason"],
+)
+RECONNECTS = Counter(
+    "aisight_gemini_reconnects_total",
+    "Gemini live sessions resumed after an upstream close",
+)
+ACTIVE_CONNECTIONS = Gauge(
+    "aisight_active_connections",
+    "WebSocket connections currently holding a live session",
+)
+REJECTED_CONNECTIONS = Gauge(
+    "aisight_rejected_connections",
+    "WebSocket connections refused by admission control since start",
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "aisight_response_cache_lookups_total",
+    "Text turns looked up in the response cache, by result",
+    ["result"],
+)
+TTS_REQUESTS = Counter(
+    "aisight_tts_requests_total",
+    "generate_audio_response calls, by result (hit: served from the TTS cache)",
+    ["result"],
+)
+TTS_DURATION = Histogram(
+    "aisight_tts_seconds",
+    "Duration of generate_audio_response calls, by result",
+    ["result"],
+)
+POOL_IDLE_SESSIONS = Gauge(
+    "aisight_session_pool_idle",
+    "Pre-warmed Gemini sessions waiting in the pool",
+    ["lang"],
+)
+POOL_CHECKOUTS = Gauge(
+    "aisight_session_pool_checkouts",
+    "Session pool checkouts since start, by result",
+    ["result"],
+)
@@ -1,11 +1,81 @@
+import os
+import asyncio
+import contextvars
+import signal
+import threading
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from .api.http import router as http_router
 from .api.websocket import router as ws_router
+from .services.audio_generator import TTS_POOL_KEY
+from .services.gemini import LIVE_CONFIGS, TTS_CONFIG, create_client
+from .services.session_pool import LiveSessionPool
+from .services.registry import ConnectionRegistry
+from .services.response_cache import ResponseCache
+from .services.tts_cache import AudioCache
+from .core.config import (
+    DRAIN_TIMEOUT,
+    RESPONSE_CACHE_SHARED,
+    STATIC_DIR,
+    TTS_CACHE_DIR,
+    TTS_POOL_SIZE,
+    TTS_SESSION_MAX_USES,
+)
+from .core.log import setup_logging
+from .utils.static_files import PrecompressedStaticFiles
+
+setup_logging()
+
+def install_drain_handler(app: FastAPI):
+    """
+    Intercept SIGTERM so active sessions can finish before uvicorn's own
+    shutdown (which closes every WebSocket) runs.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        # Signals can only be trapped from the main thread (e.g. not under TestClient)
+        return
+    loop = asyncio.get_running_loop()
+    previous = signal.getsignal(signal.SIGTERM)
+
+    async def drain_then_exit(signum, frame):
+        # Stop admitting before tearing down the pool new sessions come from
+        app.state.registry.draining = True
+        await app.state.session_pool.close()
+        await app.state.registry.drain(DRAIN_TIMEOUT)
+        if callable(previous):
+            previous(signum, frame)
+
+    def handle_sigterm(signum, frame):
+        if app.state.registry.draining:
+            return
+        # Fresh context: the signal may interrupt a connection's task, whose
+        # log fields must not leak into the drain
+        loop.call_soon_threadsafe(lambda: asyncio.ensure_future(drain_then_exit(signum, frame)),
+                                  context=contextvars.Context())
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One Gemini client per process, shared by all WebSocket connections
+    app.state.genai_client = create_client()
+    app.state.session_pool = LiveSessionPool(app.state.genai_client, LIVE_CONFIGS)
+    app.state.session_pool.start()
+    # Text-to-speech sessions are reused across phrases rather than single-use
+    app.state.tts_pool = LiveSessionPool(app.state.genai_client, {TTS_POOL_KEY: TTS_CONFIG},
+                                         size=TTS_POOL_SIZE, max_uses=TTS_SESSION_MAX_USES)
+    app.state.tts_pool.start()
+    app.state.tts_cache = AudioCache(TTS_CACHE_DIR) if TTS_CACHE_DIR else None
+    app.state.registry = ConnectionRegistry()
+    app.state.response_cache = ResponseCache() if RESPONSE_CACHE_SHARED else None
+    install_drain_handler(app)
+    yield
+    await app.state.session_pool.close()
+    await app.state.tts_pool.close()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -18,18 +88,22 @@ app.add_middleware(
 )
 
 # Static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", PrecompressedStaticFiles(directory=STATIC_DIR), name="static")
 
 # Routers
 app.include_router(http_router)
 app.include_router(ws_router)
 
 if __name__ == "__main__":
+    # WEB_CONCURRENCY > 1 runs one worker process per core; each worker has
+    # its own session registry and pool. Reload only works with one worker.
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
     uvicorn.run(
         "backend.app.main:app",
         host="0.0.0.0",
         port=8000,
         ws_max_size=2**20,
         limit_concurrency=100,
-        reload=True
+        workers=workers,
+        reload=workers == 1
     )
\ No newline at end of file
@@ -0,0 +1,21 @@
+from enum import IntEnum
+from typing import NamedTuple, Union
+from .input_type import InputType
+
+class FrameType(IntEnum):
+    """Wire codes for the binary frame protocol on /ws."""
+    TEXT = 1
+    AUDIO = 2
+    IMAGE = 3
+
+    @property
+    def input_type(self) -> InputType:
+        return InputType[self.name]
+
+class Frame(NamedTuple):
+    """A decoded binary frame: header fields plus the raw payload."""
+    type: InputType
+    seq: int
+    sample_rate: int
+    timestamp_ms: int
+    payload: Union[memoryview, str]
@@ -0,0 +1,21 @@
+from enum import IntEnum
+from typing import NamedTuple
+
+class RecordKind(IntEnum):
+    """Record types in a session recording (see services/recorder.py)."""
+    META = 0
+    CLIENT_TEXT = 1
+    CLIENT_BINARY = 2
+    MODEL_AUDIO = 3
+    MODEL_TEXT = 4
+    TURN_COMPLETE = 5
+
+    @property
+    def from_client(self) -> bool:
+        return self in (RecordKind.CLIENT_TEXT, RecordKind.CLIENT_BINARY)
+
+class Record(NamedTuple):
+    """One recorded message: microseconds since the recording started, plus payload."""
+    kind: RecordKind
+    t_us: int
+    payload: memoryview
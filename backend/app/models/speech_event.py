@@ -0,0 +1,5 @@
+from enum import Enum
+
+class SpeechEvent(str, Enum):
+    START = "speech_start"
+    END = "speech_end"
@@ -1,33 +1,71 @@
 import logging
-from google import genai
-from fastapi import WebSocket
-from ..core.config import API_KEY
+import time
+from ..core.config import TTS_VOICE
+from ..core.metrics import TTS_DURATION, TTS_REQUESTS
+from .connection import ConnectionManager
 
 logger = logging.getLogger(__name__)
 
-async def generate_audio_response(text: str, websocket: WebSocket):
-    """Generate and stream audio from text via Gemini."""
+# Pool key of the TTS sessions in app.state.tts_pool
+TTS_POOL_KEY = "tts"
+# Cached audio is sent in chunks of the size Gemini streams
+CHUNK_BYTES = 4096
+
+async def synthesize(text: str, manager: ConnectionManager) -> bytes:
+    """
+    Speak `text` on a pooled TTS session, streaming the audio to the client
+    as it arrives. Returns the complete PCM.
+    """
+    websocket = manager.active_connection
+    pool = websocket.app.state.tts_pool
+    pooled = await pool.checkout(TTS_POOL_KEY)
+    audio = bytearray()
+    try:
+        await pooled.session.send(input={"text": text}, end_of_turn=True)
+        async for response in pooled.session.receive():
+            if response.data:
+                audio += response.data
+                await manager.send_audio(websocket, response.data)
+            if response.text:
+                await websocket.send_json({"transcript": response.text})
+    except BaseException:
+        # The turn may not have completed; never hand this session out again
+        pool.drop(pooled)
+        raise
+    pool.checkin(pooled)
+    return bytes(audio)
+
+async def generate_audio_response(text: str, manager: ConnectionManager, lang: str = "en",
+                                  voice: str = TTS_VOICE):
+    """
+    Speak `text` to the manager's client, from the TTS cache when possible.
+    Audio goes through ConnectionManager.send_audio, so it is framed and
+    encoded like the model's replies.
+    """
+    started = time.perf_counter()
+    websocket = manager.active_connection
+    cache = websocket.app.state.tts_cache
+    key = cache.key(text, lang, voice) if cache is not None else None
+    result = "miss"
     try:
-        logger.debug(f"Generating audio for text: {text}")
-        config = {
-            "generation_config": {
-                "response_modalities": ["AUDIO"],
-                "audio_config": {
-                    "audio_encoding": "LINEAR16",
-                    "sample_rate_hertz": 24000,
-                    "chunk_size": 4096
-                }
-            }
-        }
-        client = genai.Client(api_key=API_KEY, http_options={"api_version": "v1alpha"})
-        async with client.aio.live.connect(model="models/gemini-2.0-flash-exp", config=config) as session:
-            await session.send(input={"text": text}, end_of_turn=True)
-            turn = session.receive()
-            async for response in turn:
-                if response.data:
-                    await websocket.send_bytes(response.data)
-                if response.text:
-                    await websocket.send_json({"transcript": response.text})
+        logger.debug("Generating audio for text: %s", text)
+        pcm = await cache.get(key) if cache is not None else None
+        if pcm is not None:
+            result = "hit"
+            for start in range(0, len(pcm), CHUNK_BYTES):
+                await manager.send_audio(websocket, pcm[start:start + CHUNK_BYTES])
+        else:
+            pcm = await synthesize(text, manager)
+            if cache is not None and pcm:
+                await cache.put(key, pcm)
+        manager.end_audio_turn()
     except Exception as e:
-        logger.error(f"Audio generation error: {e}", exc_info=True)
-        await websocket.send_json({"error": str(e)})
\ No newline at end of file
+        result = "error"
+        logger.error("Audio generation error: %s", e, exc_info=True)
+        await websocket.send_json({"error": str(e)})
+    finally:
+        elapsed = time.perf_counter() - started
+        TTS_REQUESTS.labels(result).inc()
+        TTS_DURATION.labels(result).observe(elapsed)
+        logger.debug("TTS %s in %.1f ms (cache hit ratio %s)", result, elapsed * 1000,
+                     cache.stats()["hit_ratio"] if cache is not None else None)
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Tuple
+from ..core.config import AUDIO_FRAME_LEAD_MS, AUDIO_FRAME_MS, AUDIO_JITTER_MS
+from ..core.constant import SAMPLE_RATE
+from ..core.metrics import AUDIO_FRAME_LATENESS
+from ..models.frame import FrameType
+from ..utils.audio_codec import DownstreamEncoder
+from ..utils.frame_codec import encode_frame
+
+# (turn id, index within the turn, 24 kHz PCM, arrival time)
+QueuedFrame = Tuple[int, int, bytes, float]
+
+class FramedAudioStream:
+    """
+    Per-connection downstream audio as fixed-duration, sequenced frames.
+
+    Model audio arrives in chunks of arbitrary size and faster than real
+    time. push() cuts it into `frame_ms` frames of 24 kHz PCM and queues
+    them; run() encodes each with the connection's DownstreamEncoder and
+    sends the queue on the schedule the client plays it:
+
+    - the client starts a reply `jitter_ms` after its first frame arrives
+      and plays frame k `k * frame_ms` later
+    - frames are sent no more than `lead_ms` before they are due, so the
+      client never buffers more than that and cancel() can still drop the
+      rest of a reply on the server
+    - frames that only arrive from Gemini after they were due leave a gap
+      at the client, which then shifts the rest of the reply; how late they
+      were is recorded in AUDIO_FRAME_LATENESS
+    """
+    def __init__(self, send: Callable[[bytes], Awaitable[None]], encoder: DownstreamEncoder,
+                 frame_ms: int = AUDIO_FRAME_MS, jitter_ms: int = AUDIO_JITTER_MS,
+                 lead_ms: int = AUDIO_FRAME_LEAD_MS):
+        self.send = send
+        self.encoder = encoder
+        self.frame_ms = frame_ms
+        self.jitter = jitter_ms / 1000
+        self.lead = lead_ms / 1000
+        self.frame_bytes = SAMPLE_RATE * frame_ms // 1000 * 2
+        self._pending = bytearray()
+        self._queue: Deque[QueuedFrame] = deque()
+        self._ready = asyncio.Event()
+        self.turn = 0
+        self._turn_open = False
+        self._index = 0
+        self.seq = 0
+        self.frames = 0
+        self.late_frames = 0
+        self.dropped = 0
+
+    def describe(self) -> dict:
+        """Framing parameters announced to the client on connect."""
+        return {"framed": True, "frameMs": self.frame_ms, "jitterMs": int(self.jitter * 1000)}
+
+    def push(self, pcm: bytes):
+        """Queue 24 kHz LINEAR16 model audio; whole frames become sendable."""
+        if not self._turn_open:
+            self.turn += 1
+            self._turn_open = True
+            self._index = 0
+        self._pending += pcm
+        while len(self._pending) >= self.frame_bytes:
+            self._queue_frame(bytes(self._pending[:self.frame_bytes]))
+            del self._pending[:self.frame_bytes]
+
+    def end_turn(self):
+        """Send the reply's last partial frame; the next push starts a new turn."""
+        if self._pending:
+            self._queue_frame(bytes(self._pending[:len(self._pending) - len(self._pending) % 2]))
+            self._pending.clear()
+        self._turn_open = False
+
+    def cancel(self) -> int:
+        """Drop everything not sent yet; returns the number of frames dropped."""
+        dropped = len(self._queue) + bool(self._pending)
+        self._queue.clear()
+        self._pending.clear()
+        self._turn_open = False
+        self.dropped += dropped
+        return dropped
+
+    def _queue_frame(self, pcm: bytes):
+        self._queue.append((self.turn, self._index, pcm, time.perf_counter()))
+        self._index += 1
+        self._ready.set()
+
+    async def run(self):
+        """Send queued frames as they fall due. Runs until cancelled."""
+        turn_start = 0.0
+        while True:
+            while not self._queue:
+                self._ready.clear()
+                await self._ready.wait()
+            turn, index, pcm, arrived = self._queue[0]
+            if index == 0:
+                turn_start = arrived + self.jitter
+            due = turn_start + index * self.frame_ms / 1000
+            delay = due - self.lead - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                # cancel() may have emptied the queue meanwhile
+                if not self._queue or self._queue[0][2] is not pcm:
+                    continue
+            self._queue.popleft()
+            lateness = time.perf_counter() - due
+            if lateness > 0:
+                self.late_frames += 1
+                AUDIO_FRAME_LATENESS.observe(lateness)
+                # The client plays a late frame on arrival and shifts the
+                # rest of the reply by the same amount
+                turn_start += lateness
+            # Frames are encoded only once due, so cancelled ones cost nothing
+            payload = await self.encoder.encode_async(pcm)
+            message = encode_frame(FrameType.AUDIO, payload, self.seq, self.encoder.sample_rate,
+                                   index * self.frame_ms, turn)
+            self.seq += 1
+            self.frames += 1
+            await self.send(message)
@@ -1,18 +1,109 @@
 import asyncio
-from typing import Optional
+import time
+from collections import deque
+from contextlib import suppress
+from typing import Awaitable, Callable, List, Optional, Tuple
+import numpy as np
 from fastapi import WebSocket
 from google import genai
-from ..core.config import logger, API_KEY
+from starlette.websockets import WebSocketState
+from ..core.config import (
+    logger,
+    BARGE_IN_ENABLED,
+    BARGE_IN_MIN_SPEECH_MS,
+    CONTEXT_TRANSCRIPT_TURNS,
+    FRAME_RATE_UPDATE_MS,
+    REALTIME_BATCH_WINDOW_MS,
+    RECONNECT_BASE_DELAY,
+    RECONNECT_MAX_ATTEMPTS,
+    RECONNECT_MAX_DELAY,
+    VAD_ENABLED,
+)
+from ..core.constant import SAMPLE_RATE
+from ..core.metrics import (
+    BARGE_IN_LATENCY,
+    BYTES_RECEIVED,
+    BYTES_SENT,
+    RECONNECTS,
+    RESPONSE_CACHE_LOOKUPS,
+    SEND_DURATION,
+    TIME_TO_FIRST_AUDIO,
+    TURN_CANCELS,
+)
+from ..models.input_type import InputType
+from ..models.speech_event import SpeechEvent
+from ..utils.audio_codec import DownstreamEncoder
+from ..utils.frame_codec import dumps
+from .audio_stream import FramedAudioStream
+from .frame_rate import FrameRateController
+from .input_scheduler import InputScheduler
+from .recorder import SessionRecorder
+from .response_cache import CachedResponse, ResponseCache
+from ..models.record import RecordKind
+from .session_pool import PooledSession
+from ..utils.audio_processing import (
+    PolyphaseResampler,
+    VoiceActivityDetector,
+    merge_audio_payloads,
+)
+from ..utils.image_processing import BurstSelector, ImagePipeline, SceneChangeFilter
 from websockets.exceptions import ConnectionClosedOK, ConnectionClosedError
 
 class ConnectionManager:
     """
     Manages a single WebSocket connection and Gemini live session.
+
+    When the upstream session closes (e.g. 1011 deadline expired) a new one
+    is obtained from `session_factory` with exponential backoff. Inputs keep
+    queueing in the scheduler meanwhile, and the last frame and recent text
+    turns are replayed into the new session.
     """
-    def __init__(self):
+    def __init__(self, batch_window_ms: int = REALTIME_BATCH_WINDOW_MS):
         self.active_connection: Optional[WebSocket] = None
         self.session: Optional[genai.LiveSession] = None
-        self.input_queue: asyncio.Queue = asyncio.Queue(maxsize=5)
+        self.input_queue = InputScheduler()
+        self.frame_filter = SceneChangeFilter()
+        self.image_pipeline = ImagePipeline()
+        self.burst = BurstSelector(self.forward_frame)
+        self.batch_window = batch_window_ms / 1000
+        self.vad: Optional[VoiceActivityDetector] = VoiceActivityDetector() if VAD_ENABLED else None
+        self.resampler: Optional[PolyphaseResampler] = None
+        self.downstream = DownstreamEncoder()
+        self.audio_stream: Optional[FramedAudioStream] = None
+        # A model reply is streaming from Gemini (audio seen, no
+        # turn_complete/interrupted yet)
+        self.model_turn_open = False
+        # perf_counter() at which the client will have played all model
+        # audio sent so far
+        self.playback_until = 0.0
+        # Set by a barge-in until Gemini ends the cut-off reply; its
+        # remaining audio and text are dropped
+        self._muted = False
+        # perf_counter() at which the current utterance began, backdated by
+        # the VAD's detection delay, until it has barged in or ended
+        self._speech_onset: Optional[float] = None
+        # Onset of the last barge-in, until the client acknowledges the stop
+        self._cancel_onset: Optional[float] = None
+        self.session_factory: Optional[Callable[[], Awaitable[PooledSession]]] = None
+        self._pooled: Optional[PooledSession] = None
+        self._session_ready = asyncio.Event()
+        self.last_frame: Optional[dict] = None
+        self.transcript: deque = deque(maxlen=CONTEXT_TRANSCRIPT_TURNS)
+        self.reconnects = 0
+        # perf_counter() at the end of the last user turn, until the first
+        # audio of the reply arrives (time-to-first-audio)
+        self.turn_ended_at: Optional[float] = None
+        # Moving average of upstream send durations, in seconds
+        self.send_latency = 0.0
+        self.frame_rate = FrameRateController()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.recorder: Optional[SessionRecorder] = None
+        self.lang = "en"
+        self.response_cache: Optional[ResponseCache] = None
+        # (frame hash, prompt, audio chunks, text parts) of the reply to the
+        # last text turn, collected for the response cache
+        self._capture: Optional[Tuple[int, np.ndarray, str, List[bytes], List[str]]] = None
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
@@ -21,49 +112,353 @@ class ConnectionManager:
 
     def disconnect(self):
         self.active_connection = None
+        self.burst.close()
         logger.info("WebSocket connection closed")
 
+    def use_framed_audio(self):
+        """Send model audio as sequenced fixed-duration frames (see FramedAudioStream)."""
+        self.audio_stream = FramedAudioStream(self.send_audio_frame, self.downstream)
+
+    async def send_audio_frame(self, message: bytes):
+        if self.active_connection is not None:
+            await self.active_connection.send_bytes(message)
+            self.count_sent("audio", len(message))
+
+    async def send_audio(self, websocket: WebSocket, pcm: bytes):
+        """Forward a chunk of 24 kHz model audio to the client."""
+        now = time.perf_counter()
+        self.playback_until = max(self.playback_until, now) + len(pcm) / (SAMPLE_RATE * 2)
+        if self.audio_stream is not None:
+            self.audio_stream.push(pcm)
+            return
+        payload = await self.downstream.encode_async(pcm)
+        await websocket.send_bytes(payload)
+        self.count_sent("audio", len(payload))
+
+    def end_audio_turn(self):
+        if self.audio_stream is not None:
+            self.audio_stream.end_turn()
+
+    async def forward_frame(self, image_bytes, image_type: str):
+        """Drop the frame if the scene is unchanged, else normalise and queue it."""
+        if await self.frame_filter.accept(image_bytes):
+            payload = await self.image_pipeline.process(image_bytes, image_type)
+            self.input_queue.put(InputType.IMAGE, payload)
+
+    def use_response_cache(self, cache: ResponseCache):
+        self.response_cache = cache
+        # The cache is keyed by the hash of the frame the question is about
+        self.frame_filter.track_latest = True
+
+    def resample(self, samples, sample_rate: int):
+        """Resample uplink audio to 16 kHz, keeping filter state across chunks."""
+        if self.resampler is None or self.resampler.source_rate != sample_rate:
+            self.resampler = PolyphaseResampler(sample_rate)
+        return self.resampler.process(samples)
+
+    async def on_speech_event(self, event: SpeechEvent):
+        """React to speech start/end detected on the uplink audio."""
+        logger.debug("Speech event: %s", event.value)
+        if event == SpeechEvent.START:
+            self._speech_onset = time.perf_counter() - self.vad.onset_delay_ms / 1000
+        elif event == SpeechEvent.END:
+            self._speech_onset = None
+            # Don't hold the tail of an utterance back for the batch window
+            self.input_queue.flush()
+            self.turn_ended_at = time.perf_counter()
+
+    async def check_barge_in(self):
+        """Barge in once the user has spoken for BARGE_IN_MIN_SPEECH_MS without a break."""
+        if (BARGE_IN_ENABLED and self._speech_onset is not None
+                and self.vad.longest_speech_ms >= BARGE_IN_MIN_SPEECH_MS):
+            onset, self._speech_onset = self._speech_onset, None
+            await self.barge_in(onset)
+
+    async def barge_in(self, onset: float):
+        """Cut off the model's reply because the user started speaking at `onset`."""
+        if not (self.model_turn_open or time.perf_counter() < self.playback_until):
+            return
+        # Gemini usually notices the speech too and sends `interrupted`;
+        # until then the rest of the reply is dropped
+        self._muted = self.model_turn_open
+        await self.cancel_reply("barge_in")
+        BARGE_IN_LATENCY.labels("server").observe(time.perf_counter() - onset)
+        self._cancel_onset = onset
+
+    def turn_cancel_acked(self):
+        """The client has stopped playback after a turn_cancel."""
+        if self._cancel_onset is not None:
+            BARGE_IN_LATENCY.labels("client").observe(time.perf_counter() - self._cancel_onset)
+            self._cancel_onset = None
+
+    async def cancel_reply(self, reason: str):
+        """Drop model audio not yet sent and tell the client to stop playing."""
+        dropped = self.audio_stream.cancel() if self.audio_stream is not None else 0
+        self._capture = None
+        self.turn_ended_at = None
+        self.playback_until = 0.0
+        TURN_CANCELS.labels(reason).inc()
+        logger.info("Reply cancelled (%s), %d queued audio frames dropped", reason, dropped)
+        if self.active_connection is not None:
+            message = dumps({"type": "turn_cancel", "reason": reason})
+            await self.active_connection.send_text(message)
+            self.count_sent("control", len(message))
+
+    def set_session(self, session, pooled: Optional[PooledSession] = None):
+        self.session = session
+        self._pooled = pooled
+        self._session_ready.set()
+
+    async def open_session(self):
+        """Obtain a live session from the session factory."""
+        pooled = await self.session_factory()
+        self.set_session(pooled.session, pooled)
+
+    async def close_session(self):
+        self._session_ready.clear()
+        session, pooled = self.session, self._pooled
+        self.session = self._pooled = None
+        if pooled:
+            await pooled.close()
+        elif session:
+            with suppress(Exception): await session.close()
+
+    async def reconnect(self, websocket: WebSocket) -> bool:
+        """Replace a dead upstream session, retrying with exponential backoff."""
+        await self.close_session()
+        self._capture = None
+        # The cut-off reply will not be completed by the new session
+        self.model_turn_open = self._muted = False
+        self.end_audio_turn()
+        if self.session_factory is None:
+            return False
+        with suppress(Exception):
+            await websocket.send_text(dumps({"status": "reconnecting"}))
+
+        for attempt in range(RECONNECT_MAX_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(min(RECONNECT_BASE_DELAY * 2 ** (attempt - 1), RECONNECT_MAX_DELAY))
+            try:
+                pooled = await self.session_factory()
+                await self.replay_context(pooled.session)
+            except Exception as e:
+                logger.error("Gemini reconnect attempt %d failed: %s", attempt + 1, e)
+                continue
+            self.set_session(pooled.session, pooled)
+            self.reconnects += 1
+            RECONNECTS.inc()
+            logger.info("Gemini session resumed after %d attempt(s)", attempt + 1)
+            with suppress(Exception):
+                await websocket.send_text(dumps({"status": "reconnected"}))
+            return True
+
+        logger.error("Giving up on Gemini session after repeated reconnect failures")
+        with suppress(Exception):
+            await websocket.send_text(dumps({"error": "Lost connection to the assistant"}))
+            # Closing lets the client's own reconnect logic take over
+            await websocket.close(code=1011)
+        return False
+
+    async def replay_context(self, session):
+        """Seed a fresh session with the last frame and recent transcript."""
+        if self.last_frame:
+            await session.send(input=self.last_frame)
+        if self.transcript:
+            lines = "\n".join(f"{role}: {text}" for role, text in self.transcript)
+            await session.send(
+                input=f"Context from the conversation so far, do not reply to it:\n{lines}",
+                end_of_turn=False,
+            )
+
     async def send_realtime(self):
-        """Send queued inputs to Gemini as they arrive."""
+        """Send queued inputs to Gemini, coalescing audio into batches."""
         while True:
             try:
-                input_data = await self.input_queue.get()
-                if self.session:
-                    if isinstance(input_data, str):
-                        await self.session.send(input=input_data, end_of_turn=True)
-                    else:
-                        await self.session.send(input=input_data)
+                input_type, batch = await self.input_queue.get_batch(self.batch_window)
+                if input_type == InputType.TEXT and await self.answer_from_cache(batch[0]):
+                    self.remember(input_type, batch)
+                    continue
+                message = self.realtime_input(input_type, batch)
+                # Retry the batch on the next session if this one dies mid-send
+                while True:
+                    await self._session_ready.wait()
+                    session = self.session
+                    try:
+                        started = time.perf_counter()
+                        if input_type == InputType.TEXT:
+                            await session.send(input=message, end_of_turn=True)
+                            self.turn_ended_at = time.perf_counter()
+                            self.start_capture(message)
+                        else:
+                            await session.send(input=message)
+                        duration = time.perf_counter() - started
+                        SEND_DURATION.labels(input_type.value).observe(duration)
+                        self.send_latency += (duration - self.send_latency) * 0.2
+                        break
+                    except (ConnectionClosedOK, ConnectionClosedError):
+                        if self.session is session:
+                            # receive_responses notices the close and reconnects
+                            self._session_ready.clear()
+                self.remember(input_type, batch)
             except asyncio.CancelledError:
                 # Task was cancelled, exit loop cleanly
                 logger.info("send_realtime task cancelled, exiting loop")
                 break
             except Exception as e:
-                logger.error(f"Error sending to Gemini: {e}")
-                await asyncio.sleep(0.1)
+                logger.error("Error sending to Gemini: %s", e)
+
+    async def control_frame_rate(self, websocket: WebSocket, period: float = FRAME_RATE_UPDATE_MS / 1000):
+        """Periodically retune the client's webcam frame interval."""
+        queue, frames = self.input_queue, self.frame_filter
+        last = (queue.superseded, frames.forwarded, frames.dropped)
+        while True:
+            await asyncio.sleep(period)
+            current = (queue.superseded, frames.forwarded, frames.dropped)
+            superseded, forwarded, dropped = (now - before for now, before in zip(current, last))
+            last = current
+            interval = self.frame_rate.update(self.send_latency, queue.qsize(), superseded,
+                                              forwarded + dropped, dropped)
+            if interval is not None:
+                logger.debug("Frame interval -> %d ms (send %.0f ms, queue %d, %d/%d duplicate frames)",
+                             interval, self.send_latency * 1000, queue.qsize(),
+                             dropped, forwarded + dropped)
+                await websocket.send_text(dumps({"type": "rate", "interval_ms": interval}))
+
+    def remember(self, input_type: InputType, batch: list):
+        """Keep the rolling context replayed after a reconnect."""
+        if input_type == InputType.TEXT:
+            self.transcript.append(("user", batch[0]))
+        for item in batch:
+            if isinstance(item, dict) and item["mimeType"].startswith("image/"):
+                self.last_frame = item
+
+    async def answer_from_cache(self, prompt: str) -> bool:
+        """Replay a cached reply to the same prompt about the same scene."""
+        frame_hash = self.frame_filter.latest_hash
+        thumbnail = self.frame_filter.latest_thumbnail
+        websocket = self.active_connection
+        if (self.response_cache is None or websocket is None
+                or not self.response_cache.cacheable(prompt)
+                or not self.response_cache.informative(frame_hash, thumbnail)):
+            return False
+        cached = self.response_cache.get(frame_hash, thumbnail, prompt, self.lang)
+        RESPONSE_CACHE_LOOKUPS.labels("hit" if cached else "miss").inc()
+        if cached is None:
+            return False
+        for chunk in cached.audio:
+            await self.send_audio(websocket, chunk)
+        self.end_audio_turn()
+        for text in cached.text:
+            self.transcript.append(("assistant", text))
+            message = dumps({"type": "text", "data": text})
+            await websocket.send_text(message)
+            self.count_sent("text", len(message))
+        return True
+
+    def start_capture(self, prompt: str):
+        frame_hash = self.frame_filter.latest_hash
+        thumbnail = self.frame_filter.latest_thumbnail
+        # While a reply is still streaming, the next responses belong to it
+        # and not to this prompt
+        if (self.response_cache is None or self.model_turn_open
+                or not self.response_cache.cacheable(prompt)
+                or not self.response_cache.informative(frame_hash, thumbnail)):
+            return
+        self._capture = (frame_hash, thumbnail, prompt, [], [])
+
+    def capture_response(self, response):
+        """Collect the reply to a text turn and cache it once complete."""
+        frame_hash, thumbnail, prompt, audio, text = self._capture
+        if response.data:
+            audio.append(response.data)
+        if response.text:
+            text.append(response.text)
+        server_content = response.server_content
+        if server_content and server_content.turn_complete:
+            if audio:
+                self.response_cache.put(prompt, self.lang, CachedResponse(frame_hash, thumbnail, audio, text))
+            self._capture = None
+
+    def record_response(self, response):
+        if response.data:
+            self.recorder.write(RecordKind.MODEL_AUDIO, response.data)
+        if response.text:
+            self.recorder.write(RecordKind.MODEL_TEXT, response.text.encode("utf-8"))
+        if response.server_content and response.server_content.turn_complete:
+            self.recorder.write(RecordKind.TURN_COMPLETE)
+
+    def count_received(self, kind: str, size: int):
+        self.bytes_in += size
+        BYTES_RECEIVED.labels(kind).inc(size)
+
+    def count_sent(self, kind: str, size: int):
+        self.bytes_out += size
+        BYTES_SENT.labels(kind).inc(size)
+
+    @staticmethod
+    def realtime_input(input_type: InputType, batch: list):
+        """Build one realtime input from a batch: merged audio plus latest frame."""
+        if input_type != InputType.AUDIO:
+            return batch[0]
+        audio = [item for item in batch if item["mimeType"] == "audio/pcm"]
+        media = [merge_audio_payloads(audio)] + [item for item in batch if item["mimeType"] != "audio/pcm"]
+        return media[0] if len(media) == 1 else media
 
     async def receive_responses(self, websocket: WebSocket):
         """Receive responses from Gemini and forward to client."""
         while True:
+            await self._session_ready.wait()
             try:
-                if not self.session:
-                    await asyncio.sleep(0.1)
-                    continue
-                turn = self.session.receive()
-                async for response in turn:
+                async for response in self.session.receive():
+                    if self.recorder:
+                        self.record_response(response)
+                    server_content = response.server_content
+                    if server_content and server_content.interrupted:
+                        # Gemini heard the user; stop whatever is still playing
+                        if not self._muted and time.perf_counter() < self.playback_until:
+                            await self.cancel_reply("interrupted")
+                        else:
+                            self.end_audio_turn()
+                        self.model_turn_open = self._muted = False
+                        self._capture = None
+                        continue
+                    if self._muted:
+                        if server_content and server_content.turn_complete:
+                            self.model_turn_open = self._muted = False
+                        continue
+                    if self._capture is not None:
+                        self.capture_response(response)
                     if response.data:
-                        await websocket.send_bytes(response.data)
+                        self.model_turn_open = True
+                        if self.turn_ended_at is not None:
+                            TIME_TO_FIRST_AUDIO.observe(time.perf_counter() - self.turn_ended_at)
+                            self.turn_ended_at = None
+                        await self.send_audio(websocket, response.data)
                     if response.text:
-                        await websocket.send_json({"type": "text", "data": response.text})
-                        
+                        self.transcript.append(("assistant", response.text))
+                        message = dumps({"type": "text", "data": response.text})
+                        await websocket.send_text(message)
+                        self.count_sent("text", len(message))
+                    if server_content and server_content.turn_complete:
+                        self.model_turn_open = False
+                        self.end_audio_turn()
+                continue
+            except asyncio.CancelledError:
+                raise
             except ConnectionClosedOK:
                 logger.info("Gemini session closed normally (1000)")
-                break
             except ConnectionClosedError as e:
                 if e.code == 1011:
                     logger.error("Gemini session internal error (1011): Deadline expired before operation could complete.")
                 else:
-                    logger.error(f"WebSocket closed with code {e.code}: {e.reason}")
-                break
+                    logger.error("WebSocket closed with code %s: %s", e.code, e.reason)
             except Exception as e:
-                logger.error(f"Error receiving from Gemini: {e}")
-                await asyncio.sleep(0.1)
\ No newline at end of file
+                logger.error("Error receiving from Gemini: %s", e)
+                if websocket.client_state != WebSocketState.CONNECTED:
+                    break
+                if self._pooled is None or self._pooled.is_healthy():
+                    await asyncio.sleep(0.1)
+                    continue
+
+            if not await self.reconnect(websocket):
+                break
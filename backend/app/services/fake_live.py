@@ -0,0 +1,170 @@
+import asyncio
+import base64
+import random
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Optional
+import numpy as np
+from google.genai import types
+from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
+from websockets.frames import Close
+from ..core.config import (
+    logger,
+    FAKE_CLOSE_RATE,
+    FAKE_CONNECT_LATENCY_MS,
+    FAKE_REPLY_SECONDS,
+    FAKE_RESPONSE_LATENCY_MS,
+)
+from ..core.constant import SAMPLE_RATE
+
+# int16 RMS above which an uplink chunk counts as speech (about -36 dBFS)
+SPEECH_RMS = 500
+
+@lru_cache(maxsize=8)
+def reply_audio(seconds: float, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """A 440 Hz tone standing in for the model's spoken reply."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (np.sin(2 * np.pi * 440 * t) * 8000).astype("<i2").tobytes()
+
+class _FakeSocket:
+    """Carries the `close_code` PooledSession.is_healthy() looks at."""
+    def __init__(self):
+        self.close_code: Optional[int] = None
+
+class FakeLiveSession:
+    """
+    Local stand-in for a Gemini live session.
+
+    A user turn ends with a text message sent with end_of_turn=True, or when
+    uplink audio that contained speech stays quiet for `turn_gap` seconds (a
+    crude version of Gemini's server-side turn detection). Each turn is
+    answered after `latency` seconds with `reply_seconds` of 24 kHz PCM,
+    streamed in `chunk_bytes` chunks at twice real time, then turn_complete.
+    Speech heard while a reply is streaming stops it with `interrupted`.
+    A `close_rate` fraction of turns instead fails with a 1011 close.
+    """
+    def __init__(self, latency: float = FAKE_RESPONSE_LATENCY_MS / 1000,
+                 reply_seconds: float = FAKE_REPLY_SECONDS,
+                 close_rate: float = FAKE_CLOSE_RATE, turn_gap: float = 0.5,
+                 chunk_bytes: int = 4096, rng: Optional[random.Random] = None):
+        self.latency = latency
+        self.reply = reply_audio(reply_seconds)
+        self.close_rate = close_rate
+        self.turn_gap = turn_gap
+        self.chunk_bytes = chunk_bytes
+        self.rng = rng or random.Random()
+        self._ws = _FakeSocket()
+        self._turns: asyncio.Queue = asyncio.Queue()
+        self._last_speech: Optional[float] = None
+        self._watcher: Optional[asyncio.Task] = None
+        self._replying = False
+        self._interrupted = False
+        self.bytes_received = 0
+        self.turns = 0
+
+    def _closed_error(self):
+        code = self._ws.close_code
+        if code == 1000:
+            return ConnectionClosedOK(Close(1000, ""), None)
+        return ConnectionClosedError(Close(code, "Deadline expired before operation could complete."), None)
+
+    async def send(self, input=None, end_of_turn: bool = False):
+        if self._ws.close_code is not None:
+            raise self._closed_error()
+        if isinstance(input, dict) and "text" in input:
+            input = input["text"]
+        if isinstance(input, str):
+            if end_of_turn:
+                self._end_turn()
+            return
+        for item in input if isinstance(input, list) else [input]:
+            data = item["data"]
+            if isinstance(data, str):
+                data = base64.b64decode(data)
+            self.bytes_received += len(data)
+            if item["mimeType"].startswith("audio/"):
+                self._hear(data)
+
+    def _hear(self, pcm: bytes):
+        samples = np.frombuffer(pcm[:len(pcm) // 2 * 2], dtype="<i2").astype(np.float32)
+        if samples.size and np.sqrt(np.mean(samples * samples)) > SPEECH_RMS:
+            self._last_speech = time.monotonic()
+            if self._replying:
+                self._interrupted = True
+            if self._watcher is None:
+                self._watcher = asyncio.create_task(self._watch_silence())
+
+    async def _watch_silence(self):
+        """End the turn once speech has been followed by `turn_gap` of quiet."""
+        while self._ws.close_code is None:
+            await asyncio.sleep(self.turn_gap / 4)
+            if self._last_speech is not None and time.monotonic() - self._last_speech >= self.turn_gap:
+                self._last_speech = None
+                self._end_turn()
+
+    def _end_turn(self):
+        self._turns.put_nowait(time.monotonic())
+
+    def _fail(self, code: int = 1011):
+        self._ws.close_code = code
+        if self._watcher:
+            self._watcher.cancel()
+        self._turns.put_nowait(None)
+
+    async def receive(self):
+        """Yield the reply to the next user turn, ending at turn_complete."""
+        if self._ws.close_code is not None:
+            raise self._closed_error()
+        if await self._turns.get() is None:
+            raise self._closed_error()
+        await asyncio.sleep(self.latency)
+        if self.rng.random() < self.close_rate:
+            logger.info("Fake Gemini session: injecting 1011 close")
+            self._fail(1011)
+            raise self._closed_error()
+
+        self.turns += 1
+        chunk_seconds = self.chunk_bytes / 2 / SAMPLE_RATE
+        self._replying, self._interrupted = True, False
+        for start in range(0, len(self.reply), self.chunk_bytes):
+            if self._ws.close_code is not None:
+                raise self._closed_error()
+            if self._interrupted:
+                self._replying = False
+                yield types.LiveServerMessage(server_content=types.LiveServerContent(interrupted=True))
+                return
+            blob = types.Blob(data=self.reply[start:start + self.chunk_bytes],
+                              mime_type=f"audio/pcm;rate={SAMPLE_RATE}")
+            yield types.LiveServerMessage(server_content=types.LiveServerContent(
+                model_turn=types.Content(role="model", parts=[types.Part(inline_data=blob)])))
+            await asyncio.sleep(chunk_seconds / 2)
+        self._replying = False
+        yield types.LiveServerMessage(server_content=types.LiveServerContent(turn_complete=True))
+
+    async def close(self):
+        if self._ws.close_code is None:
+            self._fail(1000)
+
+class FakeLive:
+    """Replacement for `client.aio.live`."""
+    def __init__(self, connect_latency: float = FAKE_CONNECT_LATENCY_MS / 1000, **session_options):
+        self.connect_latency = connect_latency
+        self.session_options = session_options
+        self.sessions = 0
+
+    @asynccontextmanager
+    async def connect(self, model: str, config=None):
+        await asyncio.sleep(self.connect_latency)
+        session = FakeLiveSession(**self.session_options)
+        self.sessions += 1
+        try:
+            yield session
+        finally:
+            await session.close()
+
+class FakeClient:
+    """Drop-in for genai.Client exposing only `aio.live.connect`."""
+    def __init__(self, **options):
+        self.aio = SimpleNamespace(live=FakeLive(**options))
@@ -0,0 +1,79 @@
+from typing import Optional
+from ..core.config import (
+    FRAME_INTERVAL_MAX_MS,
+    FRAME_INTERVAL_MIN_MS,
+    FRAME_INTERVAL_MS,
+    FRAME_RATE_MAX_QUEUE,
+    FRAME_RATE_MAX_SEND_MS,
+)
+
+# Share of frames dropped as duplicates above which the scene counts as
+# static, and below which it counts as busy
+STATIC_SCENE_RATIO = 0.75
+BUSY_SCENE_RATIO = 0.25
+# Frames to see before judging the scene; at long intervals this spans
+# several periods
+MIN_FRAMES = 3
+# Intervals are rounded to this many ms, and only changes of at least
+# MIN_CHANGE are sent to the client
+ROUND_MS = 50
+MIN_CHANGE = 0.1
+
+class FrameRateController:
+    """
+    Picks the webcam frame interval for one connection.
+
+    - upstream congested (slow sends, backed-up queue, frames superseded
+      before they could be sent): double the interval
+    - static scene (most frames are duplicates): lengthen it by 25%
+    - busy scene: shorten it by 20%, down to `min_ms`
+    - otherwise drift back towards the default `interval_ms`
+
+    Without congestion nothing changes until MIN_FRAMES frames have been
+    seen, so a slowed-down client is not mistaken for an idle webcam.
+    """
+    def __init__(self, interval_ms: int = FRAME_INTERVAL_MS,
+                 min_ms: int = FRAME_INTERVAL_MIN_MS, max_ms: int = FRAME_INTERVAL_MAX_MS,
+                 max_send_ms: int = FRAME_RATE_MAX_SEND_MS, max_queue: int = FRAME_RATE_MAX_QUEUE):
+        self.default_ms = interval_ms
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.max_send = max_send_ms / 1000
+        self.max_queue = max_queue
+        self.interval_ms = float(interval_ms)
+        # Last interval told to the client
+        self.client_ms = interval_ms
+        self.changes = 0
+        self._frames = 0
+        self._duplicates = 0
+
+    def update(self, send_latency: float, queue_depth: int, superseded: int,
+               frames: int, duplicates: int) -> Optional[int]:
+        """
+        Feed one period's measurements; returns the new interval in ms when
+        the client should be told to change its frame rate.
+        """
+        congested = send_latency > self.max_send or queue_depth > self.max_queue or superseded > 0
+        self._frames += frames
+        self._duplicates += duplicates
+        if not congested and self._frames < MIN_FRAMES:
+            return None
+        duplicate_ratio = self._duplicates / self._frames if self._frames else 0.5
+        self._frames = self._duplicates = 0
+        if congested:
+            self.interval_ms *= 2
+        elif duplicate_ratio >= STATIC_SCENE_RATIO:
+            self.interval_ms *= 1.25
+        elif duplicate_ratio <= BUSY_SCENE_RATIO:
+            self.interval_ms *= 0.8
+        else:
+            self.interval_ms += (self.default_ms - self.interval_ms) / 2
+        self.interval_ms = min(max(self.interval_ms, self.min_ms), self.max_ms)
+
+        target = int(round(self.interval_ms / ROUND_MS) * ROUND_MS)
+        target = min(max(target, self.min_ms), self.max_ms)
+        if abs(target - self.client_ms) < MIN_CHANGE * self.client_ms:
+            return None
+        self.client_ms = target
+        self.changes += 1
+        return target
@@ -0,0 +1,36 @@
+from google import genai
+from ..core.config import logger, API_KEY, GEMINI_BACKEND, TTS_VOICE
+from ..core.transalation import SYSTEM_INSTRUCTIONS
+from .fake_live import FakeClient
+
+LIVE_MODEL = "models/gemini-2.0-flash-exp"
+
+def create_client() -> genai.Client:
+    """Create the Gemini client shared by every connection in this process."""
+    if GEMINI_BACKEND == "fake":
+        logger.warning("GEMINI_BACKEND=fake: using the local fake live API")
+        return FakeClient()
+    return genai.Client(api_key=API_KEY, http_options={"api_version": "v1alpha"})
+
+def build_live_config(system_instruction=None, voice: str = "") -> dict:
+    config = {
+        "generation_config": {
+            "response_modalities": ["AUDIO"],
+            "audio_config": {
+                "audio_encoding": "LINEAR16",
+                "sample_rate_hertz": 24000,
+                "chunk_size": 4096
+            }
+        }
+    }
+    if system_instruction:
+        config["system_instruction"] = system_instruction
+    if voice:
+        config["generation_config"]["speech_config"] = {
+            "voice_config": {"prebuilt_voice_config": {"voice_name": voice}}
+        }
+    return config
+
+# Built once at import instead of on every connection
+LIVE_CONFIGS = {lang: build_live_config(instruction) for lang, instruction in SYSTEM_INSTRUCTIONS.items()}
+TTS_CONFIG = build_live_config(voice=TTS_VOICE)
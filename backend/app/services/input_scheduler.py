@@ -0,0 +1,144 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, List, Optional, Tuple
+from ..core.config import INPUT_AUDIO_BACKLOG
+from ..core.metrics import INPUTS_DISCARDED, QUEUE_WAIT
+from ..models.input_type import InputType
+from ..utils.async_utils import wait_event
+
+class InputScheduler:
+    """
+    Media-aware replacement for a single FIFO between the WebSocket receive
+    loop and the Gemini send loop.
+
+    - text turns have the highest priority
+    - audio is delivered in order; only when more than `max_audio` chunks
+      are backed up (e.g. while the Gemini session reconnects) is the
+      oldest chunk dropped
+    - images are latest-frame-wins: a new frame supersedes a pending one
+
+    A pending image is sent right before a text turn so the turn refers to
+    the most recent frame. get_batch() additionally coalesces consecutive
+    audio chunks, plus the latest frame, into a single batch.
+
+    Items are stored with their enqueue time so the wait until they are
+    taken is recorded in the QUEUE_WAIT histogram.
+    """
+    def __init__(self, max_audio: int = INPUT_AUDIO_BACKLOG):
+        self.max_audio = max_audio
+        self._text: deque = deque()
+        self._audio: deque = deque()
+        self._image: Optional[Tuple[float, Any]] = None
+        self._ready = asyncio.Event()
+        self._flush_requested = False
+        self._collecting = False
+        self.enqueued = {input_type: 0 for input_type in InputType}
+        self.superseded = 0
+        self.dropped = 0
+        self._wait = {input_type: QUEUE_WAIT.labels(input_type.value) for input_type in InputType}
+
+    def put(self, input_type: InputType, item: Any):
+        """Queue an item without blocking the receive loop."""
+        entry = (time.perf_counter(), item)
+        if input_type == InputType.TEXT:
+            self._text.append(entry)
+        elif input_type == InputType.AUDIO:
+            if len(self._audio) >= self.max_audio:
+                self._audio.popleft()
+                self.dropped += 1
+                INPUTS_DISCARDED.labels("backlog").inc()
+            self._audio.append(entry)
+        elif input_type == InputType.IMAGE:
+            if self._image is not None:
+                self.superseded += 1
+                INPUTS_DISCARDED.labels("superseded").inc()
+            self._image = entry
+        else:
+            raise ValueError(f"Unsupported input type: {input_type}")
+        self.enqueued[input_type] += 1
+        self._ready.set()
+
+    def _pop(self) -> Optional[Tuple[InputType, Any]]:
+        if self._text:
+            if self._image is not None:
+                return InputType.IMAGE, self._take_image()
+            return InputType.TEXT, self._taken(InputType.TEXT, self._text.popleft())
+        if self._audio:
+            return InputType.AUDIO, self._take_audio()
+        if self._image is not None:
+            return InputType.IMAGE, self._take_image()
+        return None
+
+    def _taken(self, input_type: InputType, entry: Tuple[float, Any]):
+        enqueued_at, item = entry
+        self._wait[input_type].observe(time.perf_counter() - enqueued_at)
+        return item
+
+    def _take_audio(self):
+        return self._taken(InputType.AUDIO, self._audio.popleft())
+
+    def _take_image(self):
+        entry, self._image = self._image, None
+        return self._taken(InputType.IMAGE, entry)
+
+    async def get(self) -> Tuple[InputType, Any]:
+        """Wait for and return the next (input type, item) to send."""
+        while True:
+            item = self._pop()
+            if item is not None:
+                return item
+            self._ready.clear()
+            await self._ready.wait()
+
+    async def get_batch(self, window: float) -> Tuple[InputType, List[Any]]:
+        """
+        Wait for the next item; if it is audio, keep collecting audio for up
+        to `window` seconds and append the latest pending frame.
+
+        The batch is cut short when a text turn arrives or flush() is called.
+        """
+        input_type, item = await self.get()
+        if input_type != InputType.AUDIO or window <= 0:
+            return input_type, [item]
+
+        batch = [item]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + window
+        self._collecting = True
+        try:
+            while True:
+                while self._audio:
+                    batch.append(self._take_audio())
+                remaining = deadline - loop.time()
+                if self._text or self._flush_requested or remaining <= 0:
+                    break
+                self._ready.clear()
+                await wait_event(self._ready, remaining)
+        finally:
+            self._collecting = False
+            self._flush_requested = False
+        if self._image is not None:
+            batch.append(self._take_image())
+        return InputType.AUDIO, batch
+
+    def flush(self):
+        """
+        Send the audio batch being collected, or the audio already queued for
+        the next one, without waiting for the window. With no audio pending
+        it does nothing, so it cannot cut short a later utterance's batch.
+        """
+        if self._collecting or self._audio:
+            self._flush_requested = True
+            self._ready.set()
+
+    def qsize(self) -> int:
+        return len(self._text) + len(self._audio) + (self._image is not None)
+
+    def clear(self):
+        """Discard everything still pending."""
+        self.dropped += self.qsize()
+        INPUTS_DISCARDED.labels("cleared").inc(self.qsize())
+        self._text.clear()
+        self._audio.clear()
+        self._image = None
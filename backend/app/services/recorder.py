@@ -0,0 +1,168 @@
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+import uuid
+from contextlib import suppress
+from typing import Iterator, Optional
+import numpy as np
+from ..core.config import logger
+from ..models.record import Record, RecordKind
+from ..utils.frame_codec import dumps, loads
+
+# Recording layout, all little-endian:
+#   <id>.rec  file header: magic "AISR" | version u16 | reserved u16 | start unix time ns u64
+#             then records: t_us u64 | length u32 | kind u8 | 3 pad bytes | payload
+#   <id>.idx  one (t_us u64, offset u64) pair per record, for random seek
+# Both files are append-only; the index can be rebuilt from the .rec file
+# if a crash leaves it short.
+RECORD_MAGIC = b"AISR"
+RECORD_VERSION = 1
+FILE_HEADER = struct.Struct("<4sHHQ")
+RECORD_HEADER = struct.Struct("<QIB3x")
+INDEX_ENTRY = struct.Struct("<QQ")
+INDEX_DTYPE = np.dtype([("t_us", "<u8"), ("offset", "<u8")])
+
+class SessionRecorder:
+    """
+    Append-only writer for one connection's traffic.
+
+    write() only timestamps the record and queues it; a background thread
+    appends it to buffered files, as core/log.py does for log records, so
+    the event loop never waits on the disk. close() drains the queue and
+    blocks until the files are closed.
+    """
+    def __init__(self, path: str, buffer_size: int = 1 << 16):
+        self.path = path
+        # Opened here so a bad RECORD_DIR fails the caller, not the thread
+        self._data = open(path, "wb", buffering=buffer_size)
+        self._index = open(os.path.splitext(path)[0] + ".idx", "wb", buffering=buffer_size)
+        self._start = time.perf_counter()
+        self._offset = FILE_HEADER.size
+        self._data.write(FILE_HEADER.pack(RECORD_MAGIC, RECORD_VERSION, 0, time.time_ns()))
+        self.records = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._drain, name="session-recorder", daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def create(cls, directory: str, meta: dict) -> "SessionRecorder":
+        os.makedirs(directory, exist_ok=True)
+        name = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:8]
+        recorder = cls(os.path.join(directory, name + ".rec"))
+        recorder.write(RecordKind.META, dumps(meta).encode("utf-8"))
+        logger.info("Recording session to %s", recorder.path)
+        return recorder
+
+    def write(self, kind: RecordKind, payload=b""):
+        t_us = int((time.perf_counter() - self._start) * 1e6)
+        self._queue.put((t_us, kind, payload))
+
+    def _drain(self):
+        """Writer thread: append queued records until close() sends None."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            t_us, kind, payload = item
+            try:
+                self._data.write(RECORD_HEADER.pack(t_us, len(payload), kind))
+                self._data.write(payload)
+                self._index.write(INDEX_ENTRY.pack(t_us, self._offset))
+            except Exception as e:
+                logger.error("Could not write session record to %s: %s", self.path, e)
+                continue
+            self._offset += RECORD_HEADER.size + len(payload)
+            self.records += 1
+        self._data.close()
+        self._index.close()
+
+    def client_message(self, message: dict):
+        """Record an ASGI websocket.receive message as sent by the client."""
+        if message.get("bytes") is not None:
+            self.write(RecordKind.CLIENT_BINARY, message["bytes"])
+        elif message.get("text") is not None:
+            self.write(RecordKind.CLIENT_TEXT, message["text"].encode("utf-8"))
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+        logger.info("Recorded %d records (%d bytes) to %s", self.records, self._offset, self.path)
+
+class RecordingReader:
+    """
+    Memory-mapped reader: records are returned as views into the mapping,
+    and seek() finds a timestamp by binary search over the index.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, version, _reserved, self.started_ns = FILE_HEADER.unpack_from(self._view)
+        if magic != RECORD_MAGIC or version != RECORD_VERSION:
+            raise ValueError(f"{path} is not a version {RECORD_VERSION} session recording")
+        self.index = self._load_index(os.path.splitext(path)[0] + ".idx")
+
+    def _load_index(self, index_path: str) -> np.ndarray:
+        if os.path.exists(index_path):
+            index = np.fromfile(index_path, dtype=INDEX_DTYPE)
+            last = int(index["offset"][-1]) if len(index) else len(self._view)
+            if last + RECORD_HEADER.size <= len(self._view) and self._end_of(last) == len(self._view):
+                return index
+        logger.warning("Index for %s missing or incomplete, rebuilding from the log", self.path)
+        return self._scan()
+
+    def _end_of(self, offset: int) -> int:
+        _, length, _ = RECORD_HEADER.unpack_from(self._view, offset)
+        return offset + RECORD_HEADER.size + length
+
+    def _scan(self) -> np.ndarray:
+        entries = []
+        offset = FILE_HEADER.size
+        # A record cut short by a crash is ignored
+        while offset + RECORD_HEADER.size <= len(self._view):
+            t_us, length, _ = RECORD_HEADER.unpack_from(self._view, offset)
+            if offset + RECORD_HEADER.size + length > len(self._view):
+                break
+            entries.append((t_us, offset))
+            offset += RECORD_HEADER.size + length
+        return np.array(entries, dtype=INDEX_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, i: int) -> Record:
+        offset = int(self.index["offset"][i])
+        t_us, length, kind = RECORD_HEADER.unpack_from(self._view, offset)
+        start = offset + RECORD_HEADER.size
+        return Record(RecordKind(kind), t_us, self._view[start:start + length])
+
+    def __iter__(self) -> Iterator[Record]:
+        return self.records()
+
+    def records(self, start: int = 0) -> Iterator[Record]:
+        for i in range(start, len(self)):
+            yield self[i]
+
+    def seek(self, seconds: float) -> int:
+        """Index of the first record at or after `seconds` into the session."""
+        return int(np.searchsorted(self.index["t_us"], int(seconds * 1e6)))
+
+    @property
+    def duration(self) -> float:
+        return int(self.index["t_us"][-1]) / 1e6 if len(self) else 0.0
+
+    def meta(self) -> Optional[dict]:
+        if len(self) and self[0].kind == RecordKind.META:
+            return loads(bytes(self[0].payload))
+        return None
+
+    def close(self):
+        # Fails while records are still referenced; the mapping is then
+        # released when they are garbage collected
+        with suppress(BufferError):
+            self._view.release()
+            self._mmap.close()
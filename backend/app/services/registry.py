@@ -0,0 +1,55 @@
+import asyncio
+from ..core.config import logger, ADMISSION_RETRY_AFTER, MAX_LIVE_SESSIONS
+from ..utils.async_utils import wait_event
+
+class ConnectionRegistry:
+    """
+    Per-process registry of live sessions used for admission control and
+    graceful drain on shutdown.
+    """
+    def __init__(self, max_sessions: int = MAX_LIVE_SESSIONS,
+                 retry_after: int = ADMISSION_RETRY_AFTER):
+        self.max_sessions = max_sessions
+        self.retry_after = retry_after
+        self.draining = False
+        self._active = set()
+        self._empty = asyncio.Event()
+        self._empty.set()
+        self.admitted = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    def try_admit(self, manager) -> bool:
+        """Register a connection, or refuse it when full or draining."""
+        if self.draining or len(self._active) >= self.max_sessions:
+            self.rejected += 1
+            return False
+        self._active.add(manager)
+        self._empty.clear()
+        self.admitted += 1
+        return True
+
+    def release(self, manager):
+        self._active.discard(manager)
+        if not self._active:
+            self._empty.set()
+
+    async def drain(self, timeout: float) -> bool:
+        """Stop admitting and wait for active sessions; True if all finished."""
+        self.draining = True
+        logger.info("Draining %d live session(s) for up to %.0fs", len(self._active), timeout)
+        drained = await wait_event(self._empty, timeout)
+        if not drained:
+            logger.warning("Drain timed out with %d live session(s) left", len(self._active))
+        return drained
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self._active),
+            "max": self.max_sessions,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "draining": self.draining,
+        }
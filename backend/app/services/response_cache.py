@@ -0,0 +1,122 @@
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from ..core.config import (
+    RESPONSE_CACHE_MATCH_BITS,
+    RESPONSE_CACHE_MAX_MB,
+    RESPONSE_CACHE_MAX_PIXEL_DIFF,
+    RESPONSE_CACHE_MIN_CONTRAST,
+    RESPONSE_CACHE_PROMPTS,
+    RESPONSE_CACHE_TTL,
+)
+from ..utils.image_processing import hamming_distance, thumbnail_distance
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.lower().split())
+
+class CachedResponse:
+    """
+    A model reply to one text turn: raw 24 kHz PCM chunks and text parts,
+    with the hash and thumbnail of the frame it describes.
+    """
+    def __init__(self, frame_hash: int, thumbnail: np.ndarray, audio: List[bytes], text: List[str]):
+        self.frame_hash = frame_hash
+        self.thumbnail = thumbnail
+        self.audio = audio
+        self.text = text
+        self.size = sum(len(chunk) for chunk in audio) + sum(len(part) for part in text)
+        self.created_at = time.monotonic()
+
+class ResponseCache:
+    """
+    LRU cache of replies keyed by (prompt, language, frame hash).
+
+    Only prompts in the `prompts` allow-list are cached; anything else
+    (hazard or navigation questions in particular) is always sent to the
+    model.
+
+    An entry is a candidate when its frame hash is within `match_bits`
+    bits of the current one, and only hits when the frames' thumbnails also
+    differ by at most `max_pixel_diff` in every pixel. Low-information
+    frames (see informative()) are never stored or matched. Entries older
+    than `ttl` seconds are ignored and dropped; the least recently used
+    entries are evicted once the total size exceeds `max_bytes`.
+    """
+    def __init__(self, max_bytes: int = int(RESPONSE_CACHE_MAX_MB * 2**20),
+                 ttl: float = RESPONSE_CACHE_TTL, match_bits: int = RESPONSE_CACHE_MATCH_BITS,
+                 max_pixel_diff: int = RESPONSE_CACHE_MAX_PIXEL_DIFF,
+                 min_contrast: float = RESPONSE_CACHE_MIN_CONTRAST,
+                 prompts: Iterable[str] = RESPONSE_CACHE_PROMPTS):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.match_bits = match_bits
+        self.max_pixel_diff = max_pixel_diff
+        self.min_contrast = min_contrast
+        self.prompts = {normalize_prompt(prompt) for prompt in prompts if prompt.strip()}
+        self._entries: "OrderedDict[Tuple[str, str, int], CachedResponse]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def cacheable(self, prompt: str) -> bool:
+        return normalize_prompt(prompt) in self.prompts
+
+    def informative(self, frame_hash: Optional[int], thumbnail: Optional[np.ndarray]) -> bool:
+        """
+        Whether a frame carries enough detail to be cached: dark, blank or
+        featureless frames all look alike, whatever they show.
+        """
+        return (frame_hash is not None and frame_hash != 0 and thumbnail is not None
+                and float(thumbnail.std()) >= self.min_contrast)
+
+    def get(self, frame_hash: int, thumbnail: np.ndarray, prompt: str,
+            lang: str) -> Optional[CachedResponse]:
+        prompt = normalize_prompt(prompt)
+        if prompt not in self.prompts or not self.informative(frame_hash, thumbnail):
+            return None
+        now = time.monotonic()
+        found = None
+        for key, entry in list(self._entries.items()):
+            if now - entry.created_at > self.ttl:
+                self._remove(key)
+            elif (found is None and key[0] == prompt and key[1] == lang
+                  and hamming_distance(key[2], frame_hash) <= self.match_bits
+                  and thumbnail_distance(entry.thumbnail, thumbnail) <= self.max_pixel_diff):
+                found = key
+        if found is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(found)
+        self.hits += 1
+        return self._entries[found]
+
+    def put(self, prompt: str, lang: str, response: CachedResponse):
+        prompt = normalize_prompt(prompt)
+        if (response.size > self.max_bytes or prompt not in self.prompts
+                or not self.informative(response.frame_hash, response.thumbnail)):
+            return
+        key = (prompt, lang, response.frame_hash)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = response
+        self.size += response.size
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        self.size -= self._entries.pop(key).size
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import suppress
+from typing import Deque, Dict, Set
+from ..core.config import (
+    logger,
+    SESSION_POOL_CHECK_INTERVAL,
+    SESSION_POOL_MAX_IDLE,
+    SESSION_POOL_SIZE,
+)
+from ..utils.async_utils import wait_event
+from .gemini import LIVE_MODEL
+
+class PooledSession:
+    """
+    An open Gemini live session together with the context manager that
+    owns its upstream WebSocket.
+    """
+    def __init__(self, context, session, key: str):
+        self.context = context
+        self.session = session
+        self.key = key
+        self.created_at = time.monotonic()
+        self.uses = 0
+
+    def is_healthy(self) -> bool:
+        """
+        Whether the upstream socket is still open. google-genai has no public
+        API for this, so it reads AsyncSession._ws (present in the pinned
+        1.x releases and in 2.x); a session without it, or whose socket has
+        no close_code, is assumed healthy and fails on first use instead.
+        """
+        ws = getattr(self.session, "_ws", None)
+        return ws is None or getattr(ws, "close_code", None) is None
+
+    async def close(self):
+        with suppress(Exception):
+            await self.context.__aexit__(None, None, None)
+
+class LiveSessionPool:
+    """
+    Bounded pool of pre-opened Gemini live sessions keyed by config name
+    (the language codes of SYSTEM_INSTRUCTIONS).
+
+    A checked-out session belongs to one connection and is closed with
+    it, and a background task opens replacements. Short request/response
+    users (text-to-speech) can instead checkin() a session after a complete
+    turn, and it is handed out again up to `max_uses` times; such sessions
+    count towards `size` while checked out, so the pool does not open a
+    replacement that would crowd them out on checkin. drop() closes one
+    that must not be reused. Idle sessions
+    older than `max_idle` seconds or whose upstream socket has closed are
+    discarded.
+    """
+    def __init__(self, client, configs: Dict[str, dict], size: int = SESSION_POOL_SIZE,
+                 max_idle: float = SESSION_POOL_MAX_IDLE,
+                 check_interval: float = SESSION_POOL_CHECK_INTERVAL,
+                 model: str = LIVE_MODEL, max_uses: int = 1):
+        self.client = client
+        self.configs = configs
+        self.size = size
+        self.max_idle = max_idle
+        self.check_interval = check_interval
+        self.model = model
+        self.max_uses = max_uses
+        self._idle: Dict[str, Deque[PooledSession]] = {key: deque() for key in configs}
+        # Sessions checked out that are expected back through checkin()
+        self._lent: Dict[str, int] = {key: 0 for key in configs}
+        self._wakeup = asyncio.Event()
+        self._task = None
+        # Background close() calls, referenced until done so they are not
+        # garbage collected mid-way
+        self._closing: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.checkout_latencies: Deque[float] = deque(maxlen=1024)
+
+    async def open(self, key: str) -> PooledSession:
+        """Open a new live session for a config key."""
+        context = self.client.aio.live.connect(model=self.model, config=self.configs[key])
+        session = await context.__aenter__()
+        return PooledSession(context, session, key)
+
+    def _usable(self, pooled: PooledSession) -> bool:
+        return pooled.is_healthy() and time.monotonic() - pooled.created_at < self.max_idle
+
+    async def checkout(self, key: str) -> PooledSession:
+        """Take a warm session for `key`, opening one directly on a miss."""
+        start = time.perf_counter()
+        idle = self._idle[key]
+        pooled = None
+        while idle:
+            candidate = idle.popleft()
+            if self._usable(candidate):
+                pooled = candidate
+                break
+            self._discard(candidate)
+
+        hit = pooled is not None
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+            pooled = await self.open(key)
+        if self.max_uses > 1:
+            self._lent[key] += 1
+        self._wakeup.set()
+
+        latency = time.perf_counter() - start
+        self.checkout_latencies.append(latency)
+        logger.debug("Session checkout (%s): %s in %.1f ms", key, "hit" if hit else "miss", latency * 1000)
+        return pooled
+
+    def checkin(self, pooled: PooledSession):
+        """Return a session whose last turn completed, or close it if used up."""
+        self._return(pooled)
+        pooled.uses += 1
+        idle = self._idle[pooled.key]
+        if pooled.uses < self.max_uses and self._usable(pooled) and len(idle) < max(self.size, 1):
+            # Most recently used first, so a busy key keeps reusing one session
+            idle.appendleft(pooled)
+        else:
+            self._close_later(pooled)
+
+    def drop(self, pooled: PooledSession):
+        """Close a checked-out session that must not be handed out again."""
+        self._return(pooled)
+        self._close_later(pooled)
+
+    def _return(self, pooled: PooledSession):
+        if self.max_uses > 1:
+            self._lent[pooled.key] -= 1
+            self._wakeup.set()
+
+    def _discard(self, pooled: PooledSession):
+        self.expired += 1
+        self._close_later(pooled)
+
+    def _close_later(self, pooled: PooledSession):
+        task = asyncio.create_task(pooled.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _maintain(self):
+        """Evict stale idle sessions and top every key up to `size`."""
+        while True:
+            # Cleared before refilling, so a checkout during open() wakes
+            # the next pass rather than being lost
+            self._wakeup.clear()
+            for key, idle in self._idle.items():
+                for pooled in [p for p in idle if not self._usable(p)]:
+                    idle.remove(pooled)
+                    self._discard(pooled)
+                while len(idle) + self._lent[key] < self.size:
+                    try:
+                        idle.append(await self.open(key))
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        logger.error("Could not pre-open Gemini session (%s): %s", key, e)
+                        break
+            await wait_event(self._wakeup, self.check_interval)
+
+    def start(self):
+        if self.size > 0 and self._task is None:
+            self._task = asyncio.create_task(self._maintain())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        for idle in self._idle.values():
+            while idle:
+                await idle.popleft().close()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def stats(self) -> dict:
+        latencies = sorted(self.checkout_latencies)
+        return {
+            "idle": {key: len(idle) for key, idle in self._idle.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "checkout_p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else None,
+            "checkout_max_ms": latencies[-1] * 1000 if latencies else None,
+        }
@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from collections import OrderedDict
+from contextlib import suppress
+from typing import Optional
+from ..core.config import logger, TTS_CACHE_DIR, TTS_CACHE_MAX_MB
+
+class AudioCache:
+    """
+    Disk-backed LRU cache of synthesised speech (raw 24 kHz PCM).
+
+    One file per phrase, named by the hash of (text, language, voice).
+    Recency is the file's mtime, so the order survives restarts; the index
+    of sizes is rebuilt from the directory on start. Files are written to a
+    temporary name and renamed, so several workers can share a directory.
+    File I/O runs in the default executor.
+    """
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = int(TTS_CACHE_MAX_MB * 2**20)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(".pcm"):
+                with suppress(FileNotFoundError):
+                    stat = os.stat(os.path.join(directory, name))
+                    entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        # Least recently used first
+        self._sizes: "OrderedDict[str, int]" = OrderedDict(
+            (key, size) for _, key, size in sorted(entries))
+        self.size = sum(self._sizes.values())
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    @staticmethod
+    def key(text: str, lang: str, voice: str) -> str:
+        return hashlib.sha256("\0".join((text.strip(), lang, voice)).encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".pcm")
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+            return data
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, pcm: bytes):
+        tmp = self._path(key) + "." + uuid.uuid4().hex[:8] + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(pcm)
+        os.replace(tmp, self._path(key))
+
+    def _remove(self, key: str):
+        self.size -= self._sizes.pop(key)
+        with suppress(FileNotFoundError):
+            os.remove(self._path(key))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(None, self._read, key) if key in self._sizes else None
+        if data is None:
+            # Possibly evicted by another worker
+            if key in self._sizes:
+                self.size -= self._sizes.pop(key)
+            self.misses += 1
+            return None
+        self._sizes.move_to_end(key)
+        self.hits += 1
+        return data
+
+    async def put(self, key: str, pcm: bytes):
+        if len(pcm) > self.max_bytes:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._write, key, pcm)
+        except OSError as e:
+            logger.error("Could not write TTS cache entry: %s", e)
+            return
+        if key in self._sizes:
+            self.size -= self._sizes.pop(key)
+        self._sizes[key] = len(pcm)
+        self.size += len(pcm)
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._sizes)))
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._sizes),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,15 @@
+import asyncio
+
+async def wait_event(event: asyncio.Event, timeout: float) -> bool:
+    """
+    Wait for an event with a timeout.
+
+    Unlike asyncio.wait_for, a cancellation that races with the event being
+    set is never swallowed.
+    """
+    waiter = asyncio.ensure_future(event.wait())
+    try:
+        await asyncio.wait((waiter,), timeout=timeout)
+    finally:
+        waiter.cancel()
+    return event.is_set()
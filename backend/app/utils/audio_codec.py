@@ -0,0 +1,169 @@
+import asyncio
+import time
+import numpy as np
+import logging
+from typing import Optional
+from ..core.constant import SAMPLE_RATE
+from .audio_processing import PolyphaseResampler
+
+logger = logging.getLogger(__name__)
+
+DOWNSTREAM_CODECS = ("pcm", "mulaw", "adpcm")
+DOWNSTREAM_RATES = (SAMPLE_RATE, 16000)
+
+# G.711 mu-law
+_MULAW_BIAS = 0x84
+_MULAW_CLIP = 32635
+
+def _build_mulaw_table() -> np.ndarray:
+    """Encode every possible int16 sample once; encoding is then a lookup."""
+    samples = np.arange(-32768, 32768, dtype=np.int32)
+    sign = (samples < 0).astype(np.int32) << 7
+    magnitude = np.minimum(np.abs(samples), _MULAW_CLIP) + _MULAW_BIAS
+    exponent = np.clip(np.floor(np.log2(magnitude)).astype(np.int32) - 7, 0, 7)
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    encoded = ~(sign | (exponent << 4) | mantissa) & 0xFF
+    # Index the table with the sample's bit pattern as uint16
+    return np.roll(encoded.astype(np.uint8), -32768)
+
+_MULAW_TABLE = _build_mulaw_table()
+
+def mulaw_encode(samples: np.ndarray) -> bytes:
+    return _MULAW_TABLE[samples.view(np.uint16)].tobytes()
+
+def mulaw_decode(data: bytes) -> np.ndarray:
+    encoded = ~np.frombuffer(data, dtype=np.uint8).astype(np.int32) & 0xFF
+    exponent = (encoded >> 4) & 0x07
+    magnitude = (((encoded & 0x0F) << 3) + _MULAW_BIAS << exponent) - _MULAW_BIAS
+    return np.where(encoded & 0x80, -magnitude, magnitude).astype(np.int16)
+
+# IMA ADPCM
+_IMA_STEPS = [
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+    11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+    32767,
+]
+_IMA_INDEX_ADJUST = [-1, -1, -1, -1, 2, 4, 6, 8]
+
+class ImaAdpcmEncoder:
+    """
+    Stateful IMA ADPCM encoder producing self-describing blocks.
+
+    Each block starts with the encoder state (predictor int16 LE, step index
+    u8, reserved u8) so a decoder can resynchronise on any block, and the
+    sample count (u16 LE) so the padding nibble of an odd-length block is
+    not played, followed by 4-bit codes packed low nibble first. The
+    predictor update is sequential by nature, so this is a tight scalar
+    loop rather than a NumPy kernel; DownstreamEncoder runs it off the
+    event loop.
+    """
+    def __init__(self):
+        self.predictor = 0
+        self.index = 0
+
+    def encode(self, samples: np.ndarray) -> bytes:
+        predictor, index = self.predictor, self.index
+        header = (np.array([predictor], dtype="<i2").tobytes() + bytes((index, 0))
+                  + np.array([len(samples)], dtype="<u2").tobytes())
+        steps, adjust = _IMA_STEPS, _IMA_INDEX_ADJUST
+        codes = bytearray(len(samples))
+
+        for i, sample in enumerate(samples.tolist()):
+            step = steps[index]
+            diff = sample - predictor
+            code = 0
+            if diff < 0:
+                code = 8
+                diff = -diff
+            delta = step >> 3
+            if diff >= step:
+                code |= 4
+                diff -= step
+                delta += step
+            step >>= 1
+            if diff >= step:
+                code |= 2
+                diff -= step
+                delta += step
+            step >>= 1
+            if diff >= step:
+                code |= 1
+                delta += step
+            predictor = predictor - delta if code & 8 else predictor + delta
+            predictor = -32768 if predictor < -32768 else 32767 if predictor > 32767 else predictor
+            index += adjust[code & 7]
+            index = 0 if index < 0 else 88 if index > 88 else index
+            codes[i] = code
+
+        self.predictor, self.index = predictor, index
+        nibbles = np.frombuffer(bytes(codes), dtype=np.uint8)
+        if len(nibbles) % 2:
+            nibbles = np.append(nibbles, np.uint8(0))
+        packed = nibbles[0::2] | (nibbles[1::2] << 4)
+        return header + packed.tobytes()
+
+class DownstreamEncoder:
+    """
+    Per-connection encoder for model audio sent to the browser: optional
+    downsampling from 24 kHz followed by mu-law or IMA ADPCM compression.
+    """
+    def __init__(self, codec: str = "pcm", sample_rate: int = SAMPLE_RATE):
+        if codec not in DOWNSTREAM_CODECS:
+            raise ValueError(f"Unsupported audio codec: {codec}")
+        if sample_rate not in DOWNSTREAM_RATES:
+            raise ValueError(f"Unsupported audio sample rate: {sample_rate}")
+        self.codec = codec
+        self.sample_rate = sample_rate
+        self._resampler: Optional[PolyphaseResampler] = (
+            PolyphaseResampler(SAMPLE_RATE, sample_rate) if sample_rate != SAMPLE_RATE else None
+        )
+        self._adpcm = ImaAdpcmEncoder() if codec == "adpcm" else None
+        # The resampler and ADPCM state must see chunks one at a time and in
+        # order, even when several tasks send audio to the same client
+        self._lock = asyncio.Lock()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.encode_seconds = 0.0
+
+    @property
+    def passthrough(self) -> bool:
+        return self.codec == "pcm" and self._resampler is None
+
+    def encode(self, pcm: bytes) -> bytes:
+        """Encode one chunk of 24 kHz LINEAR16 audio from Gemini."""
+        self.bytes_in += len(pcm)
+        if self.passthrough:
+            self.bytes_out += len(pcm)
+            return pcm
+
+        start = time.perf_counter()
+        samples = np.frombuffer(pcm[:len(pcm) - len(pcm) % 2], dtype="<i2")
+        if self._resampler is not None:
+            samples = self._resampler.process(samples)
+        if self.codec == "mulaw":
+            encoded = mulaw_encode(samples)
+        elif self.codec == "adpcm":
+            encoded = self._adpcm.encode(samples)
+        else:
+            encoded = samples.astype("<i2").tobytes()
+        self.encode_seconds += time.perf_counter() - start
+        self.bytes_out += len(encoded)
+        return encoded
+
+    async def encode_async(self, pcm: bytes) -> bytes:
+        """
+        encode() without blocking the event loop: ADPCM encoding runs in the
+        default executor. Concurrent calls are serialised per encoder.
+        """
+        if self._adpcm is None:
+            return self.encode(pcm)
+        async with self._lock:
+            return await asyncio.get_running_loop().run_in_executor(None, self.encode, pcm)
+
+    def describe(self) -> dict:
+        """Audio format announced to the client on connect."""
+        return {"codec": self.codec, "sampleRate": self.sample_rate}
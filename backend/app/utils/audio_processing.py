@@ -1,19 +1,46 @@
 import base64
 import numpy as np
 import logging
+from collections import deque
+from functools import lru_cache
+from math import gcd
+from typing import List, Optional, Tuple
+from scipy import signal
+from ..core.config import (
+    VAD_ENERGY_THRESHOLD_DB,
+    VAD_HANGOVER_MS,
+    VAD_PREROLL_MS,
+    VAD_ZCR_MAX,
+)
+from ..core.constant import AUDIO_INPUT_SAMPLE_RATE
+from ..core.metrics import INPUTS_DISCARDED
+from ..models.speech_event import SpeechEvent
+from .encoding import base64_decoded_length
 
 logger = logging.getLogger(__name__)
 
 async def process_audio_input(audio_data, max_size_bytes: int = 2 * 1024 * 1024):
     """
-    Convert raw audio (list, base64 string, or bytes) to a dict payload.
+    Convert raw audio (list, base64 string, bytes or int16 array) to a dict payload.
+
+    Base64 input is validated and forwarded without being decoded.
     """
     try:
         if isinstance(audio_data, list):
             audio_array = np.array(audio_data, dtype=np.int16)
             audio_bytes = audio_array.tobytes()
+        elif isinstance(audio_data, np.ndarray):
+            audio_bytes = audio_data.astype(np.int16, copy=False).tobytes()
         elif isinstance(audio_data, str):
-            audio_bytes = base64.b64decode(audio_data)
+            size = base64_decoded_length(audio_data)
+            if size > max_size_bytes:
+                raise ValueError("Audio too large")
+            if size % 2:
+                raise ValueError("Audio is not 16-bit PCM")
+            return {
+                "mimeType": "audio/pcm",
+                "data": audio_data
+            }
         else:
             audio_bytes = audio_data
 
@@ -25,5 +52,188 @@ async def process_audio_input(audio_data, max_size_bytes: int = 2 * 1024 * 1024)
             "data": base64.b64encode(audio_bytes).decode('utf-8')
         }
     except Exception as e:
-        logger.error(f"Audio processing error: {e}")
-        raise ValueError("Invalid audio data format")
\ No newline at end of file
+        logger.error("Audio processing error: %s", e)
+        raise ValueError("Invalid audio data format")
+
+
+def merge_audio_payloads(payloads: list) -> dict:
+    """
+    Concatenate several PCM payloads into one, in order.
+    """
+    if len(payloads) == 1:
+        return payloads[0]
+    audio_bytes = b"".join(base64.b64decode(payload["data"]) for payload in payloads)
+    return {
+        "mimeType": "audio/pcm",
+        "data": base64.b64encode(audio_bytes).decode('utf-8')
+    }
+
+def decode_pcm(audio_data) -> np.ndarray:
+    """
+    Decode raw audio (list, base64 string, or bytes) to int16 samples.
+    """
+    try:
+        if isinstance(audio_data, list):
+            return np.array(audio_data, dtype=np.int16)
+        if isinstance(audio_data, str):
+            audio_data = base64.b64decode(audio_data, validate=True)
+        if len(audio_data) % 2:
+            raise ValueError("Audio is not 16-bit PCM")
+        return np.frombuffer(audio_data, dtype=np.int16)
+    except Exception as e:
+        logger.error("Audio decoding error: %s", e)
+        raise ValueError("Invalid audio data format")
+
+class VoiceActivityDetector:
+    """
+    Energy and zero-crossing voice activity detector for streamed PCM.
+
+    Silent chunks are held back in a short pre-roll buffer instead of being
+    forwarded; on speech onset the pre-roll is released ahead of the chunk
+    so the first syllable is not clipped. After speech, chunks keep flowing
+    until `hangover_ms` of continuous silence has passed.
+    """
+    def __init__(self, sample_rate: int = AUDIO_INPUT_SAMPLE_RATE, frame_ms: int = 20,
+                 energy_threshold_db: float = VAD_ENERGY_THRESHOLD_DB,
+                 zcr_max: float = VAD_ZCR_MAX,
+                 hangover_ms: int = VAD_HANGOVER_MS,
+                 preroll_ms: int = VAD_PREROLL_MS):
+        self.frame_ms = frame_ms
+        self.frame_size = sample_rate * frame_ms // 1000
+        self.energy_threshold_db = energy_threshold_db
+        self.zcr_max = zcr_max
+        self.hangover_frames = hangover_ms // frame_ms
+        self.preroll_samples = sample_rate * preroll_ms // 1000
+        self.speaking = False
+        self._silent_frames = 0
+        self._preroll: deque = deque()
+        self._preroll_len = 0
+        # How long before the end of the START chunk speech began, and the
+        # longest unbroken run of speech frames in the current utterance
+        self.onset_delay_ms = 0
+        self._run = 0
+        self._longest_run = 0
+        self.chunks_in = 0
+        self.chunks_suppressed = 0
+
+    def speech_frames(self, samples: np.ndarray) -> np.ndarray:
+        """Classify each frame of a chunk as speech (True) or silence."""
+        num_frames = max(len(samples) // self.frame_size, 1)
+        frames = np.zeros((num_frames, self.frame_size), dtype=np.float32)
+        usable = samples[:num_frames * self.frame_size]
+        frames.reshape(-1)[:len(usable)] = usable
+        frames /= 32768.0
+
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        loud = energy_db > self.energy_threshold_db
+        return loud & ((zcr < self.zcr_max) | (energy_db > self.energy_threshold_db + 10))
+
+    def process(self, samples: np.ndarray) -> Tuple[List[np.ndarray], Optional[SpeechEvent]]:
+        """
+        Feed one chunk; return the chunks to forward and a speech event, if any.
+        """
+        self.chunks_in += 1
+        speech = self.speech_frames(samples)
+        trailing_silence = len(speech) - 1 - int(np.flatnonzero(speech)[-1]) if speech.any() else len(speech)
+
+        if not self.speaking:
+            if not speech.any():
+                self._hold(samples)
+                self.chunks_suppressed += 1
+                INPUTS_DISCARDED.labels("silence").inc()
+                return [], None
+            self.speaking = True
+            self._silent_frames = trailing_silence
+            self.onset_delay_ms = (len(speech) - int(np.flatnonzero(speech)[0])) * self.frame_ms
+            self._run = self._longest_run = 0
+            self._track_runs(speech)
+            chunks = list(self._preroll) + [samples]
+            self._preroll.clear()
+            self._preroll_len = 0
+            return chunks, SpeechEvent.START
+
+        self._track_runs(speech)
+        self._silent_frames = trailing_silence if speech.any() else self._silent_frames + len(speech)
+        if self._silent_frames >= self.hangover_frames:
+            self.speaking = False
+            return [samples], SpeechEvent.END
+        return [samples], None
+
+    @property
+    def longest_speech_ms(self) -> int:
+        return self._longest_run * self.frame_ms
+
+    def _track_runs(self, speech: np.ndarray):
+        for is_speech in speech.tolist():
+            self._run = self._run + 1 if is_speech else 0
+            if self._run > self._longest_run:
+                self._longest_run = self._run
+
+    def _hold(self, samples: np.ndarray):
+        """Keep the most recent `preroll_ms` of silence for the next onset."""
+        self._preroll.append(samples)
+        self._preroll_len += len(samples)
+        while self._preroll and self._preroll_len - len(self._preroll[0]) >= self.preroll_samples:
+            self._preroll_len -= len(self._preroll.popleft())
+
+@lru_cache(maxsize=16)
+def polyphase_filter_bank(up: int, down: int, taps_per_phase: int) -> np.ndarray:
+    """
+    Design a low-pass FIR for rational resampling by up/down and split it
+    into `up` phases of `taps_per_phase` taps, shaped (up, taps_per_phase).
+    """
+    num_taps = up * taps_per_phase
+    h = signal.firwin(num_taps, 1.0 / max(up, down), window=("kaiser", 8.0)) * up
+    # Phase p uses taps h[p], h[p + up], h[p + 2 * up], ...
+    return np.ascontiguousarray(h.reshape(taps_per_phase, up).T, dtype=np.float32)
+
+class PolyphaseResampler:
+    """
+    Streaming polyphase resampler for int16 PCM.
+
+    The filter history and output phase are carried across calls, so
+    consecutive chunks resample exactly as one continuous signal would.
+    """
+    def __init__(self, source_rate: int, target_rate: int = AUDIO_INPUT_SAMPLE_RATE,
+                 taps_per_phase: int = 48):
+        if not 8000 <= source_rate <= 192000:
+            raise ValueError(f"Unsupported sample rate: {source_rate}")
+        factor = gcd(source_rate, target_rate)
+        self.source_rate = source_rate
+        self.target_rate = target_rate
+        self.up = target_rate // factor
+        self.down = source_rate // factor
+        self.taps = taps_per_phase
+        self._filters = polyphase_filter_bank(self.up, self.down, taps_per_phase)
+        self._tap_offsets = np.arange(taps_per_phase)
+        self._history = np.zeros(taps_per_phase - 1, dtype=np.float32)
+        self._consumed = 0     # input samples consumed so far
+        self._next_output = 0  # index of the next output sample
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample one chunk, returning the output samples it completes."""
+        if self.up == self.down:
+            return samples
+        buffer = np.concatenate((self._history, samples.astype(np.float32)))
+        end = self._consumed + len(samples)
+
+        # Output m sits at input position m * down / up and needs every input
+        # sample up to floor(m * down / up), so stop before the chunk end.
+        last = (end * self.up + self.down - 1) // self.down
+        positions = np.arange(self._next_output, last, dtype=np.int64) * self.down
+        phases = positions % self.up
+        newest = positions // self.up - self._consumed + self.taps - 1
+        window = buffer[newest[:, None] - self._tap_offsets]
+        output = np.einsum("ij,ij->i", window, self._filters[phases])
+
+        self._history = buffer[len(buffer) - (self.taps - 1):]
+        self._consumed = end
+        self._next_output = last
+        # Rebase the counters so they stay small over long sessions
+        shift = self._consumed // self.down * self.down
+        self._consumed -= shift
+        self._next_output -= shift // self.down * self.up
+
+        return np.clip(np.rint(output), -32768, 32767).astype(np.int16)
@@ -0,0 +1,61 @@
+import base64
+import binascii
+import re
+from typing import Optional
+
+_BASE64_RE = re.compile(r"[A-Za-z0-9+/]*={0,2}")
+
+# Enough decoded bytes to recognise every signature below (RIFF....WEBP)
+_SNIFF_CHARS = 24
+
+_IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+)
+
+def split_data_url(data: str) -> str:
+    """
+    Return the base64 part of a data URL, or the string unchanged.
+    """
+    if data.startswith("data:"):
+        comma = data.find(",")
+        if comma < 0:
+            raise ValueError("Invalid data URL format")
+        return data[comma + 1:]
+    return data
+
+def base64_decoded_length(data: str) -> int:
+    """
+    Validate a base64 string without decoding it and return the decoded size.
+    """
+    if len(data) % 4:
+        raise ValueError("Invalid base64 length")
+    if not _BASE64_RE.fullmatch(data):
+        raise ValueError("Invalid base64 characters")
+    padding = 2 if data.endswith("==") else 1 if data.endswith("=") else 0
+    return len(data) // 4 * 3 - padding
+
+def decode_base64_prefix(data: str, num_chars: int = _SNIFF_CHARS) -> bytes:
+    """
+    Decode only the first few characters of a base64 string.
+    """
+    prefix = data[:num_chars - num_chars % 4]
+    try:
+        return base64.b64decode(prefix, validate=True)
+    except binascii.Error as e:
+        raise ValueError(f"Invalid base64 data: {e}")
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """
+    Identify an image format from its leading magic bytes.
+    """
+    header = bytes(header[:12])
+    for signature, image_type in _IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_type
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
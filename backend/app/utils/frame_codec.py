@@ -0,0 +1,52 @@
+import struct
+import orjson
+from ..models.frame import Frame, FrameType
+
+# Binary frame layout (little-endian, 20 bytes) followed by the raw payload:
+#   version u8 | type u8 | flags u16 | seq u32 | sample_rate u32 | timestamp_ms u64
+# Audio payloads are int16 PCM, image payloads are encoded image bytes and
+# text payloads are UTF-8.
+#
+# Framed downstream audio (services/audio_stream.py) uses the same header:
+# seq counts frames, flags holds the reply's turn id (mod 2^16) and
+# timestamp_ms is the frame's offset from the start of the reply. The
+# payload is encoded with the connection's downstream codec.
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("<BBHIIQ")
+
+def decode_frame(data: bytes) -> Frame:
+    """
+    Parse a binary WebSocket message into a Frame.
+    """
+    if len(data) < FRAME_HEADER.size:
+        raise ValueError("Frame too short")
+    version, frame_type, _flags, seq, sample_rate, timestamp_ms = FRAME_HEADER.unpack_from(data)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported frame version: {version}")
+    try:
+        frame_type = FrameType(frame_type)
+    except ValueError:
+        raise ValueError(f"Unknown frame type: {frame_type}")
+
+    # A view, so large image/audio payloads are not copied
+    payload = memoryview(data)[FRAME_HEADER.size:]
+    if frame_type is FrameType.TEXT:
+        payload = str(payload, "utf-8")
+    return Frame(frame_type.input_type, seq, sample_rate, timestamp_ms, payload)
+
+def encode_frame(frame_type: FrameType, payload: bytes, seq: int = 0,
+                 sample_rate: int = 0, timestamp_ms: int = 0, flags: int = 0) -> bytes:
+    """
+    Build a binary WebSocket message from header fields and a payload.
+    """
+    header = FRAME_HEADER.pack(FRAME_VERSION, frame_type, flags & 0xFFFF, seq & 0xFFFFFFFF,
+                               sample_rate, timestamp_ms)
+    return header + payload
+
+def loads(data):
+    """Decode a JSON control message."""
+    return orjson.loads(data)
+
+def dumps(obj) -> str:
+    """Encode a JSON control message as text."""
+    return orjson.dumps(obj).decode("utf-8")
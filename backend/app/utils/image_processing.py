@@ -1,43 +1,395 @@
+import asyncio
 import base64
+import binascii
+import io
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, List, Optional, Tuple
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+from ..core.config import (
+    BURST_ENABLED,
+    BURST_WINDOW_MS,
+    FRAME_DEDUP_ENABLED,
+    FRAME_DEDUP_MAX_STALENESS,
+    FRAME_DEDUP_THRESHOLD,
+    IMAGE_FORMAT,
+    IMAGE_GRAYSCALE,
+    IMAGE_MAX_EDGE,
+    IMAGE_QUALITY,
+    IMAGE_WORKERS,
+)
+from ..core.log import sampler
+from ..core.metrics import INPUTS_DISCARDED
+from .encoding import (
+    base64_decoded_length,
+    decode_base64_prefix,
+    sniff_image_type,
+    split_data_url,
+)
 
 logger = logging.getLogger(__name__)
 
+# Image decoding and encoding release the GIL, so CPU-heavy frame work runs
+# here instead of on the event loop.
+image_executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="image")
+
 async def process_image_input(image_data):
     """
     Convert raw image (data URL, base64 string, or bytes) to a dict payload.
+
+    Base64 input is validated and forwarded as-is; only the first few bytes
+    are decoded to identify the image format.
     """
     try:
         if isinstance(image_data, str):
-            if image_data.startswith('data:image'):
-                parts = image_data.split(',')
-                if len(parts) < 2:
-                    raise ValueError("Invalid data URL format")
-                base64_data = parts[1]
-            else:
-                base64_data = image_data
-            image_bytes = base64.b64decode(base64_data)
-        elif isinstance(image_data, bytes):
-            image_bytes = image_data
+            base64_data = split_data_url(image_data)
+            if not base64_decoded_length(base64_data):
+                raise ValueError("Empty image data received")
+            image_type = sniff_image_type(decode_base64_prefix(base64_data))
+        elif isinstance(image_data, (bytes, bytearray, memoryview)):
+            if not len(image_data):
+                raise ValueError("Empty image data received")
+            image_type = sniff_image_type(image_data)
+            base64_data = None
         else:
             raise ValueError(f"Unsupported image data type: {type(image_data)}")
 
-        if not image_bytes:
-            raise ValueError("Empty image data received")
+        if not image_type:
+            raise ValueError("Invalid image data")
 
-        # Optionally verify image type
-        try:
-            import imghdr
-            image_type = imghdr.what(None, h=image_bytes)
-            if not image_type:
-                raise ValueError("Invalid image data")
-        except ImportError:
-            image_type = None
+        if base64_data is None:
+            base64_data = base64.b64encode(image_data).decode('utf-8')
 
         return {
-            "mimeType": f"image/{image_type or 'jpeg'}",
-            "data": base64.b64encode(image_bytes).decode('utf-8')
+            "mimeType": f"image/{image_type}",
+            "data": base64_data
         }
     except Exception as e:
-        logger.error(f"Image processing failed: {e}")
-        raise ValueError(f"Could not process image: {e}")
\ No newline at end of file
+        logger.error("Image processing failed: %s", e)
+        raise ValueError(f"Could not process image: {e}")
+
+
+def _b64decode(data: str) -> bytes:
+    try:
+        return base64.b64decode(data, validate=True)
+    except binascii.Error as e:
+        raise ValueError(f"Invalid base64 data: {e}")
+
+async def decode_image_input(image_data) -> Tuple[bytes, str]:
+    """
+    Return (encoded image bytes, image type) for a client frame: raw bytes
+    from a binary frame, or a base64 string / data URL from a JSON message.
+
+    Base64 is validated and decoded once, in the image thread pool; the
+    payload sent to Gemini is only built for frames that are forwarded
+    (see ImagePipeline.process).
+    """
+    if isinstance(image_data, str):
+        loop = asyncio.get_running_loop()
+        image_bytes = await loop.run_in_executor(image_executor, _b64decode, split_data_url(image_data))
+    elif isinstance(image_data, (bytes, bytearray, memoryview)):
+        image_bytes = image_data
+    else:
+        raise ValueError(f"Unsupported image data type: {type(image_data)}")
+    if not len(image_bytes):
+        raise ValueError("Empty image data received")
+    image_type = sniff_image_type(image_bytes)
+    if not image_type:
+        raise ValueError("Invalid image data")
+    return image_bytes, image_type
+
+# Edge of the grayscale thumbnail frame_fingerprint() returns
+THUMBNAIL_SIZE = 32
+
+def _decode_reduced_gray(image_bytes):
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    return cv2.imdecode(buffer, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+
+def _dhash(gray) -> int:
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def image_dhash(image_bytes) -> Optional[int]:
+    """
+    Compute a 64-bit difference hash of an encoded image.
+
+    The image is decoded at 1/8 scale in grayscale, shrunk to 9x8 and each
+    bit records whether a pixel is brighter than its right-hand neighbour.
+    """
+    gray = _decode_reduced_gray(image_bytes)
+    if gray is None:
+        return None
+    return _dhash(gray)
+
+def frame_fingerprint(image_bytes) -> Optional[Tuple[int, np.ndarray]]:
+    """
+    Compute the dHash of an encoded image together with a
+    THUMBNAIL_SIZE x THUMBNAIL_SIZE grayscale thumbnail, from one decode.
+
+    The hash is only good for finding candidates; the thumbnail tells
+    apart scenes whose hashes agree but whose details (the text on a sign)
+    do not.
+    """
+    gray = _decode_reduced_gray(image_bytes)
+    if gray is None:
+        return None
+    thumbnail = cv2.resize(gray, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), interpolation=cv2.INTER_AREA)
+    return _dhash(gray), thumbnail
+
+def thumbnail_distance(a: np.ndarray, b: np.ndarray) -> int:
+    """Largest per-pixel difference between two thumbnails."""
+    return int(cv2.absdiff(a, b).max())
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+class SceneChangeFilter:
+    """
+    Per-connection filter that drops webcam frames showing the same scene
+    as the last forwarded frame.
+
+    `latest_hash` is the hash of the most recent frame, forwarded or not.
+    With `track_latest` it is kept up to date even when dedup is disabled,
+    and `latest_thumbnail` holds that frame's thumbnail (see
+    frame_fingerprint()).
+    """
+    def __init__(self, threshold: int = FRAME_DEDUP_THRESHOLD,
+                 max_staleness: float = FRAME_DEDUP_MAX_STALENESS,
+                 enabled: bool = FRAME_DEDUP_ENABLED):
+        self.threshold = threshold
+        self.max_staleness = max_staleness
+        self.enabled = enabled
+        self.last_hash: Optional[int] = None
+        self.latest_hash: Optional[int] = None
+        self.latest_thumbnail: Optional[np.ndarray] = None
+        self.track_latest = False
+        self.last_forwarded = 0.0
+        self.forwarded = 0
+        self.dropped = 0
+
+    def accept_hash(self, frame_hash: Optional[int], now: float) -> bool:
+        """Decide whether a frame with the given hash should be forwarded."""
+        is_duplicate = (
+            frame_hash is not None
+            and self.last_hash is not None
+            and hamming_distance(frame_hash, self.last_hash) <= self.threshold
+            and now - self.last_forwarded < self.max_staleness
+        )
+        if is_duplicate:
+            self.dropped += 1
+            INPUTS_DISCARDED.labels("duplicate_frame").inc()
+            return False
+        self.last_hash = frame_hash
+        self.last_forwarded = now
+        self.forwarded += 1
+        return True
+
+    async def accept(self, image_bytes) -> bool:
+        """Hash an encoded image off the event loop and filter it."""
+        if not self.enabled and not self.track_latest:
+            return True
+        loop = asyncio.get_running_loop()
+        if self.track_latest:
+            fingerprint = await loop.run_in_executor(image_executor, frame_fingerprint, image_bytes)
+            frame_hash, self.latest_thumbnail = fingerprint if fingerprint is not None else (None, None)
+        else:
+            frame_hash = await loop.run_in_executor(image_executor, image_dhash, image_bytes)
+        self.latest_hash = frame_hash
+        if not self.enabled:
+            return True
+        return self.accept_hash(frame_hash, time.monotonic())
+
+def frame_quality(image_bytes) -> float:
+    """
+    Score an encoded image for how usable it is: the variance of its
+    Laplacian (sharpness), scaled down for frames that are too dark or too
+    bright or have clipped shadows/highlights.
+    """
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    gray = cv2.imdecode(buffer, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if gray is None:
+        return -1.0
+    sharpness = cv2.Laplacian(gray, cv2.CV_32F).var()
+    mean = float(gray.mean())
+    clipped = float(np.count_nonzero((gray <= 5) | (gray >= 250))) / gray.size
+    exposure = (1.0 - abs(mean - 128.0) / 256.0) * (1.0 - clipped)
+    return float(sharpness) * exposure
+
+# (image bytes, payload) of a frame held by BurstSelector
+HeldFrame = Tuple[bytes, str]
+
+class BurstSelector:
+    """
+    Per-connection filter that collapses bursts of webcam frames into the
+    best one.
+
+    A frame with no other frame in the `window` seconds before it is
+    forwarded at once and becomes the lead of a possible burst. Frames
+    arriving within the window of the previous one are held; `window`
+    seconds after the first of them, or when flush() is called, the frame
+    with the highest frame_quality() among the lead and the held frames
+    wins. It is passed to `forward` unless it is the lead, which already
+    went out. Frames are only scored when a burst actually happens.
+    """
+    def __init__(self, forward: Optional[Callable[[bytes, str], Awaitable[None]]] = None,
+                 window_ms: int = BURST_WINDOW_MS, enabled: bool = BURST_ENABLED):
+        self.forward = forward
+        self.window = window_ms / 1000
+        self.enabled = enabled and window_ms > 0
+        self._lead: Optional[HeldFrame] = None
+        self._burst: List[HeldFrame] = []
+        self._last_submit: Optional[float] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+        self.bursts = 0
+        self.dropped = 0
+
+    async def submit(self, image_bytes, image_type: str):
+        """Forward a lone frame now, or hold it as part of a burst."""
+        if not self.enabled:
+            await self.forward(image_bytes, image_type)
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        in_burst = bool(self._burst) or (self._last_submit is not None
+                                         and now - self._last_submit <= self.window)
+        self._last_submit = now
+        if not in_burst:
+            if self._task is not None and not self._task.done():
+                # Keep frames in order: an earlier burst may still be scoring
+                await asyncio.wait([self._task])
+            self._lead = (image_bytes, image_type)
+            await self._forward(self._lead)
+            return
+        self._burst.append((image_bytes, image_type))
+        if self._timer is None:
+            self._timer = loop.call_later(self.window, self._window_closed)
+
+    def _window_closed(self):
+        self._timer = None
+        self._task = asyncio.ensure_future(self._select(self._task))
+
+    async def flush(self):
+        """
+        Forward the best frame of the current burst now. Returns once it is
+        forwarded, along with any burst whose window had already closed.
+        """
+        await self._select(self._task)
+
+    async def _select(self, previous: Optional[asyncio.Task]):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        burst, self._burst = self._burst, []
+        lead, self._lead = self._lead, None
+        if previous is not None and not previous.done():
+            # Keep frames in order: an earlier burst may still be scoring
+            await asyncio.wait([previous])
+        if not burst:
+            return
+        candidates = [lead] + burst if lead is not None else burst
+        if len(candidates) > 1:
+            loop = asyncio.get_running_loop()
+            scores = [await loop.run_in_executor(image_executor, frame_quality, image_bytes)
+                      for image_bytes, _ in candidates]
+            best = candidates[scores.index(max(scores))]
+            self.bursts += 1
+            held_dropped = len(burst) - (0 if best is lead else 1)
+            self.dropped += held_dropped
+            INPUTS_DISCARDED.labels("burst").inc(held_dropped)
+            sampler.debug(logger, "burst", "Burst of %d frames, scores %s",
+                          len(candidates), ", ".join(f"{score:.0f}" for score in scores))
+        else:
+            best = candidates[0]
+        if best is not lead:
+            await self._forward(best)
+
+    async def _forward(self, frame: HeldFrame):
+        try:
+            await self.forward(*frame)
+        except Exception as e:
+            logger.error("Dropping frame: %s", e)
+
+    def close(self):
+        """Discard any held frames."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._task is not None:
+            self._task.cancel()
+        self._lead = None
+        self._burst = []
+
+class ImagePipeline:
+    """
+    Per-connection normalisation of webcam frames before they go to Gemini:
+    bounded resolution, optional grayscale and re-encoding, which also drops
+    EXIF metadata. Frames that already comply are forwarded untouched. The
+    base64 payload is built here, in the thread pool, so frames dropped
+    earlier (burst, dedup) are never encoded.
+    """
+    _PIL_FORMATS = {"jpeg": "JPEG", "webp": "WEBP"}
+
+    def __init__(self, max_edge: int = IMAGE_MAX_EDGE, image_format: str = IMAGE_FORMAT,
+                 quality: int = IMAGE_QUALITY, grayscale: bool = IMAGE_GRAYSCALE):
+        if image_format not in self._PIL_FORMATS:
+            raise ValueError(f"Unsupported output image format: {image_format}")
+        self.max_edge = max_edge
+        self.image_format = image_format
+        self.quality = quality
+        self.grayscale = grayscale
+        self.frames = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def normalize(self, image_bytes) -> Tuple[Optional[bytes], str]:
+        """
+        Return (re-encoded bytes, image type), or (None, image type) when the
+        frame can be forwarded as-is.
+        """
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            source_type = (image.format or "").lower()
+            needs_resize = max(image.size) > self.max_edge
+            if not (needs_resize or self.grayscale
+                    or source_type != self.image_format
+                    or image.getexif()):
+                return None, source_type
+
+            if needs_resize and source_type == "jpeg":
+                # Let libjpeg decode at a reduced scale
+                image.draft("L" if self.grayscale else "RGB", (self.max_edge, self.max_edge))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("L" if self.grayscale else "RGB")
+            if needs_resize:
+                image.thumbnail((self.max_edge, self.max_edge), Image.Resampling.BILINEAR)
+
+            output = io.BytesIO()
+            image.save(output, format=self._PIL_FORMATS[self.image_format], quality=self.quality)
+            return output.getvalue(), self.image_format
+
+    def encode(self, image_bytes, image_type: str) -> Tuple[dict, int]:
+        """Normalise a frame and build its Gemini payload; returns (payload, size)."""
+        encoded, normalized_type = self.normalize(image_bytes)
+        if encoded is None:
+            encoded, normalized_type = image_bytes, image_type
+        payload = {
+            "mimeType": f"image/{normalized_type}",
+            "data": base64.b64encode(encoded).decode('utf-8')
+        }
+        return payload, len(encoded)
+
+    async def process(self, image_bytes, image_type: str) -> dict:
+        """Normalise and encode a frame in the image thread pool."""
+        loop = asyncio.get_running_loop()
+        payload, size_out = await loop.run_in_executor(image_executor, self.encode, image_bytes, image_type)
+
+        size_in = len(image_bytes)
+        self.frames += 1
+        self.bytes_in += size_in
+        self.bytes_out += size_out
+        sampler.debug(logger, "image_normalised", "Image normalised: %d -> %d bytes", size_in, size_out)
+        return payload
@@ -0,0 +1,85 @@
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Dict, Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+# name.<10 hex digits>.ext as written by backend/tools/build_assets.py
+HASHED_NAME = re.compile(r"\.[0-9a-f]{10}\.[A-Za-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Cacheable, but revalidated with the ETag on every use
+REVALIDATE = "no-cache"
+# Preferred first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+def accepted_encodings(headers: Headers) -> set:
+    accept = headers.get("accept-encoding", "")
+    return {part.split(";")[0].strip() for part in accept.split(",")}
+
+def cache_control(path: str) -> str:
+    return IMMUTABLE if HASHED_NAME.search(path) else REVALIDATE
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves a file's .br/.gz sibling when the client accepts
+    it, and marks content-hashed files as immutable.
+    """
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        accepted = accepted_encodings(request_headers)
+        response = None
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and os.path.isfile(full_path + suffix):
+                media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+                response = FileResponse(full_path + suffix, status_code=status_code,
+                                        stat_result=os.stat(full_path + suffix), media_type=media_type)
+                response.headers["content-encoding"] = encoding
+                break
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["cache-control"] = cache_control(full_path)
+        response.headers["vary"] = "Accept-Encoding"
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+class StaticPage:
+    """
+    An HTML page (plus its .br/.gz variants) held in memory, served with an
+    ETag so browsers revalidate cheaply. The file is re-read only when its
+    mtime changes.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.media_type = mimetypes.guess_type(path)[0] or "text/html"
+        self._mtime: Optional[float] = None
+        self._variants: Dict[str, Tuple[bytes, str]] = {}
+
+    def _load(self):
+        mtime = os.stat(self.path).st_mtime
+        if mtime == self._mtime:
+            return
+        variants = {}
+        for encoding, suffix in (("identity", ""),) + ENCODINGS:
+            if os.path.isfile(self.path + suffix):
+                with open(self.path + suffix, "rb") as f:
+                    body = f.read()
+                variants[encoding] = (body, '"' + hashlib.sha1(body).hexdigest()[:16] + '"')
+        self._variants, self._mtime = variants, mtime
+
+    def response(self, request: Request) -> Response:
+        self._load()
+        accepted = accepted_encodings(request.headers)
+        encoding = next((name for name, _ in ENCODINGS if name in accepted and name in self._variants), "identity")
+        body, etag = self._variants[encoding]
+        headers = {"etag": etag, "cache-control": REVALIDATE, "vary": "Accept-Encoding"}
+        if encoding != "identity":
+            headers["content-encoding"] = encoding
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type=self.media_type, headers=headers)
@@ -0,0 +1,56 @@
+"""
+Compare the legacy decode/re-encode ingest path with the base64 pass-through.
+
+Run with: python -m backend.benchmarks.bench_base64
+"""
+import asyncio
+import base64
+import os
+import timeit
+import tracemalloc
+
+from backend.app.utils.audio_processing import process_audio_input
+from backend.app.utils.image_processing import process_image_input
+
+def legacy_passthrough(data: str) -> dict:
+    """The previous behaviour: full decode followed by a full re-encode."""
+    raw = base64.b64decode(data)
+    return {"mimeType": "image/jpeg", "data": base64.b64encode(raw).decode('utf-8')}
+
+def make_jpeg_base64(size: int) -> str:
+    return base64.b64encode(b"\xff\xd8\xff\xe0" + os.urandom(size - 4)).decode()
+
+def measure_peak_allocation(func, payload) -> int:
+    """Return the peak number of bytes allocated while running func."""
+    tracemalloc.start()
+    func(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def main():
+    loop = asyncio.new_event_loop()
+    run_image = lambda data: loop.run_until_complete(process_image_input(data))
+    run_audio = lambda data: loop.run_until_complete(process_audio_input(data))
+    audio = base64.b64encode(os.urandom(8192)).decode()
+
+    cases = [
+        ("legacy 100KB image", legacy_passthrough, make_jpeg_base64(100_000)),
+        ("pass-through 100KB image", run_image, make_jpeg_base64(100_000)),
+        ("legacy 300KB image", legacy_passthrough, make_jpeg_base64(300_000)),
+        ("pass-through 300KB image", run_image, make_jpeg_base64(300_000)),
+        ("legacy 4096-sample audio", legacy_passthrough, audio),
+        ("pass-through 4096-sample audio", run_audio, audio),
+    ]
+    # "copies" is the peak allocation expressed in payload-sized buffers
+    print(f"{'case':<32}{'mean':>12}{'peak bytes':>12}{'copies':>8}")
+    for name, func, payload in cases:
+        number = 200
+        mean = timeit.timeit(lambda: func(payload), number=number) / number
+        peak = measure_peak_allocation(func, payload)
+        copies = peak / len(payload)
+        print(f"{name:<32}{mean * 1e6:>10.1f}us{peak:>12}{copies:>8.2f}")
+    loop.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Bytes saved and encode cost of the downstream audio codecs.
+
+Encodes 10 seconds of speech-like 24 kHz LINEAR16 audio in 4096-sample
+chunks (Gemini's chunk size) and reports the output bitrate, the saving
+relative to raw PCM and the CPU time spent per second of audio.
+
+Run with: python -m backend.benchmarks.bench_downstream_codec
+"""
+import time
+
+import numpy as np
+
+from backend.app.core.constant import SAMPLE_RATE
+from backend.app.utils.audio_codec import DownstreamEncoder
+
+CHUNK_SAMPLES = 4096
+
+def speech_like(seconds: int) -> np.ndarray:
+    """Harmonic tone with syllable-rate amplitude modulation plus noise."""
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE * seconds) / SAMPLE_RATE
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t)
+    audio = 6000 * envelope * voiced + rng.normal(0, 200, len(t))
+    return np.clip(audio, -32768, 32767).astype(np.int16)
+
+def main(seconds: int = 10):
+    audio = speech_like(seconds)
+    chunks = [audio[i:i + CHUNK_SAMPLES].tobytes() for i in range(0, len(audio), CHUNK_SAMPLES)]
+    print(f"{'codec':>8}{'rate':>8}{'kbit/s':>10}{'saved':>9}{'encode ms per s':>18}")
+    for codec in ("pcm", "mulaw", "adpcm"):
+        for rate in (SAMPLE_RATE, 16000):
+            encoder = DownstreamEncoder(codec, rate)
+            start = time.process_time()
+            for chunk in chunks:
+                encoder.encode(chunk)
+            cpu = time.process_time() - start
+            kbits = encoder.bytes_out * 8 / seconds / 1000
+            saved = 1 - encoder.bytes_out / encoder.bytes_in
+            print(f"{codec:>8}{rate:>8}{kbits:>10.0f}{saved:>9.0%}{cpu / seconds * 1000:>18.2f}")
+
+if __name__ == "__main__":
+    main()
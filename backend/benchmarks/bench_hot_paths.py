@@ -0,0 +1,205 @@
+"""
+Microbenchmarks for the per-message ingest and forwarding paths, with a
+stored baseline and a regression gate.
+
+Every case is timed as the best of several timeit repeats and divided by
+a fixed pure-Python calibration loop, so the baseline carries over between
+machines of different speed. The suite runs --runs times (default 5) and
+each case is judged on its median normalised time, as a single run of the
+calibration loop alone varies by 30 % or more on shared machines. A case
+fails when that median exceeds the baseline by more than --threshold
+(default 1.5). The run-to-run spread (slowest / fastest run) only decides
+whether a failing case is measured again: a noisy case over the threshold
+gets --retries more rounds of --runs runs, and is judged on the median of
+all of them, against the same threshold. Cases that mix threads and
+native code (the dedup hash, burst scoring) vary far more than the rest.
+The regressions this guards against (an extra decode/re-encode, a Python
+loop over samples) cost 2x or more.
+
+Run with:      python -m backend.benchmarks.bench_hot_paths
+Save baseline: python -m backend.benchmarks.bench_hot_paths --save
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import statistics
+import sys
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+from backend.app.models.frame import FrameType
+from backend.app.models.input_type import InputType
+from backend.app.services.connection import ConnectionManager
+from backend.app.utils.audio_codec import DownstreamEncoder
+from backend.app.utils.audio_processing import process_audio_input
+from backend.app.utils.frame_codec import decode_frame, dumps, encode_frame, loads
+from backend.app.utils.image_processing import (
+    ImagePipeline,
+    SceneChangeFilter,
+    decode_image_input,
+    frame_quality,
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "hot_paths_baseline.json")
+# Spread above which a case over the threshold is measured again
+NOISY_SPREAD = 1.25
+
+def calibration():
+    """Fixed pure-Python workload used as the unit of time."""
+    total = 0
+    for i in range(20000):
+        total += i * i % 7
+    return total
+
+def make_jpeg(width: int, height: int, quality: int = 80) -> bytes:
+    """A camera-like frame: smooth gradient, a few shapes and sensor noise."""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    image = np.dstack([(x + y) / 2, np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width))])
+    image = image.astype(np.uint8)
+    cv2.rectangle(image, (width // 4, height // 4), (width // 2, height // 2), (30, 200, 90), -1)
+    cv2.circle(image, (3 * width // 4, height // 2), height // 6, (220, 40, 40), -1)
+    image = cv2.add(image, rng.integers(0, 16, image.shape, dtype=np.uint8))
+    return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+
+def build_cases(loop: asyncio.AbstractEventLoop) -> List[Tuple[str, Callable[[], object]]]:
+    run = loop.run_until_complete
+    rng = np.random.default_rng(1)
+    samples = (rng.standard_normal(4096) * 3000).astype(np.int16)
+    pcm = samples.tobytes()
+    sample_list = samples.tolist()
+    audio_b64 = base64.b64encode(pcm).decode()
+
+    jpeg_1080p = make_jpeg(1920, 1080)
+    jpeg_b64 = base64.b64encode(jpeg_1080p).decode()
+    data_url = "data:image/jpeg;base64," + jpeg_b64
+    jpeg_vga = make_jpeg(640, 480, 70)
+
+    audio_json = dumps({"type": "audio", "data": sample_list, "sampleRate": 16000})
+    image_json = dumps({"type": "image", "data": data_url})
+    audio_frame = encode_frame(FrameType.AUDIO, pcm, 1, 16000)
+
+    pipeline = ImagePipeline()
+    frame_filter = SceneChangeFilter(max_staleness=0)
+    pcm_out = DownstreamEncoder("pcm")
+    mulaw_out = DownstreamEncoder("mulaw", 16000)
+    reply = (np.sin(np.arange(2048) / 5) * 8000).astype(np.int16).tobytes()
+    batch = [{"mimeType": "audio/pcm", "data": audio_b64}] * 5 + [{"mimeType": "image/jpeg", "data": jpeg_b64}]
+
+    return [
+        # Ingest: client message -> scheduler payload
+        ("audio int list (4096)", lambda: run(process_audio_input(sample_list))),
+        ("audio base64 (4096)", lambda: run(process_audio_input(audio_b64))),
+        ("audio binary frame (4096)", lambda: run(process_audio_input(bytes(decode_frame(audio_frame).payload)))),
+        ("image 1080p base64 decode", lambda: run(decode_image_input(jpeg_b64))),
+        ("image 1080p data URL decode", lambda: run(decode_image_input(data_url))),
+        ("image dedup hash 1080p", lambda: run(frame_filter.accept(jpeg_1080p))),
+        ("image burst score 1080p", lambda: frame_quality(jpeg_1080p)),
+        ("image normalise 1080p", lambda: pipeline.normalize(jpeg_1080p)),
+        ("image normalise 640x480", lambda: pipeline.normalize(jpeg_vga)),
+        # JSON control/legacy message parsing
+        ("json parse audio int list", lambda: loads(audio_json)),
+        ("json parse 1080p data URL", lambda: loads(image_json)),
+        # Forwarding: upstream batch building, downstream audio and text
+        ("upstream batch merge (5+1)", lambda: ConnectionManager.realtime_input(InputType.AUDIO, batch)),
+        ("downstream pcm passthrough", lambda: pcm_out.encode(reply)),
+        ("downstream mulaw 16 kHz", lambda: mulaw_out.encode(reply)),
+        ("downstream text message", lambda: dumps({"type": "text", "data": "A person is holding a red cup."})),
+    ]
+
+def measure(func: Callable[[], object], repeat: int = 3) -> float:
+    """Best-of-`repeat` seconds per call."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+def sample(cases: List[Tuple[str, Callable[[], object]]], runs: int,
+           samples: Dict[str, List[float]], units: List[float]):
+    """Append `runs` normalised times per case to `samples`."""
+    for _ in range(runs):
+        # Recalibrated every run, as the machine's speed drifts too
+        unit = measure(calibration)
+        units.append(unit)
+        for name, func in cases:
+            samples.setdefault(name, []).append(measure(func) / unit)
+
+def median(samples: Dict[str, List[float]]) -> Dict[str, float]:
+    return {name: statistics.median(times) for name, times in samples.items()}
+
+def spread(samples: Dict[str, List[float]]) -> Dict[str, float]:
+    return {name: max(times) / min(times) for name, times in samples.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot path microbenchmarks")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="fail when a case is this many times slower than its baseline")
+    parser.add_argument("--runs", type=int, default=5, help="judge each case on the median of this many runs")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="extra rounds of --runs runs for a noisy case over the threshold")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    baseline, baseline_spreads = {}, {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        baseline = stored["cases"]
+        baseline_spreads = stored.get("spread", {})
+
+    loop = asyncio.new_event_loop()
+    try:
+        cases = build_cases(loop)
+        samples: Dict[str, List[float]] = {}
+        calibrations: List[float] = []
+        sample(cases, args.runs, samples, calibrations)
+        for _ in range(0 if args.save else args.retries):
+            results, spreads = median(samples), spread(samples)
+            noisy = [(name, func) for name, func in cases
+                     if name in baseline and results[name] / baseline[name] > args.threshold
+                     and max(spreads[name], baseline_spreads.get(name, 0)) > NOISY_SPREAD]
+            if not noisy:
+                break
+            print(f"Re-measuring noisy case(s): {', '.join(name for name, _ in noisy)}")
+            sample(noisy, args.runs, samples, calibrations)
+    finally:
+        loop.close()
+    unit = statistics.median(calibrations)
+    results, spreads = median(samples), spread(samples)
+
+    print(f"calibration unit: {unit * 1e6:.1f}us")
+    print(f"{'case':<30}{'time':>12}{'units':>10}{'baseline':>10}{'ratio':>8}{'spread':>8}")
+    regressions = []
+    for name, units in results.items():
+        reference = baseline.get(name)
+        ratio = units / reference if reference else None
+        flag = ""
+        if ratio is not None and ratio > args.threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<30}{units * unit * 1e6:>10.1f}us{units:>10.4g}"
+              f"{reference if reference is not None else float('nan'):>10.4g}"
+              f"{ratio if ratio is not None else float('nan'):>8.2f}{spreads[name]:>8.2f}{flag}")
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({"unit": "calibration loop",
+                       "cases": {k: float(f"{v:.4g}") for k, v in results.items()},
+                       "spread": {k: float(f"{v:.3g}") for k, v in spreads.items()}},
+                      f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} case(s) regressed by more than {args.threshold:.2f}x")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Throughput of the streaming polyphase resampler on a single core.
+
+Reports how many seconds of audio are resampled to 16 kHz per second of
+CPU time, feeding 4096-sample chunks as the browser ScriptProcessor does.
+
+Run with: python -m backend.benchmarks.bench_resample
+"""
+import time
+
+import numpy as np
+
+from backend.app.utils.audio_processing import PolyphaseResampler
+
+CHUNK_SAMPLES = 4096
+
+def main(seconds_of_audio: int = 60):
+    # The realtime factor is also the number of live streams one core can sustain
+    print(f"{'source rate':>12}{'per chunk':>12}{'realtime factor':>18}")
+    for rate in (48000, 44100, 32000, 22050, 8000):
+        rng = np.random.default_rng(0)
+        audio = (rng.standard_normal(rate * seconds_of_audio) * 3000).astype(np.int16)
+        chunks = [audio[i:i + CHUNK_SAMPLES] for i in range(0, len(audio), CHUNK_SAMPLES)]
+        resampler = PolyphaseResampler(rate)
+
+        start = time.process_time()
+        for chunk in chunks:
+            resampler.process(chunk)
+        cpu = time.process_time() - start
+
+        factor = seconds_of_audio / cpu
+        print(f"{rate:>10}Hz{cpu / len(chunks) * 1e6:>10.0f}us{factor:>17.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Measure upstream messages/s and audio send latency with and without
+coalescing of realtime inputs in ConnectionManager.send_realtime.
+
+A fake session charges a fixed cost per session.send call. Audio chunks
+(85 ms, as sent by a 48 kHz browser) and frames (every 500 ms) are produced
+at real-time pace, and each chunk's samples carry its index so latency
+from enqueue to upstream send can be measured per chunk.
+
+Run with: python -m backend.benchmarks.bench_send_batching
+"""
+import argparse
+import asyncio
+import base64
+import logging
+import statistics
+import time
+
+import numpy as np
+
+from backend.app.models.input_type import InputType
+from backend.app.services.connection import ConnectionManager
+
+CHUNK_SAMPLES = 1365
+CHUNK_INTERVAL = CHUNK_SAMPLES / 16000
+FRAME_INTERVAL = 0.5
+
+class FakeSession:
+    def __init__(self, send_cost: float):
+        self.send_cost = send_cost
+        self.messages = 0
+        self.sent_at = {}
+
+    async def send(self, input, end_of_turn=False):
+        await asyncio.sleep(self.send_cost)
+        self.messages += 1
+        now = time.perf_counter()
+        for item in input if isinstance(input, list) else [input]:
+            if item["mimeType"] == "audio/pcm":
+                samples = np.frombuffer(base64.b64decode(item["data"]), dtype=np.int16)
+                for index in np.unique(samples):
+                    self.sent_at[int(index)] = now
+
+async def run(window_ms: int, duration: float, send_cost: float):
+    manager = ConnectionManager(batch_window_ms=window_ms)
+    manager.set_session(FakeSession(send_cost))
+    sender = asyncio.create_task(manager.send_realtime())
+    frame = {"mimeType": "image/jpeg", "data": base64.b64encode(b"\xff\xd8\xff" + bytes(20_000)).decode()}
+
+    enqueued_at = {}
+    start = time.perf_counter()
+    next_frame = start
+    index = 0
+    while time.perf_counter() - start < duration:
+        chunk = np.full(CHUNK_SAMPLES, index, dtype=np.int16).tobytes()
+        enqueued_at[index] = time.perf_counter()
+        manager.input_queue.put(InputType.AUDIO, {"mimeType": "audio/pcm", "data": base64.b64encode(chunk).decode()})
+        if time.perf_counter() >= next_frame:
+            manager.input_queue.put(InputType.IMAGE, frame)
+            next_frame += FRAME_INTERVAL
+        index += 1
+        await asyncio.sleep(start + index * CHUNK_INTERVAL - time.perf_counter())
+
+    await asyncio.sleep(window_ms / 1000 + send_cost * 4)
+    elapsed = time.perf_counter() - start
+    sender.cancel()
+    await asyncio.gather(sender, return_exceptions=True)
+
+    session = manager.session
+    latencies = [session.sent_at[i] - enqueued_at[i] for i in enqueued_at if i in session.sent_at]
+    return session.messages / elapsed, statistics.median(latencies), len(latencies), len(enqueued_at)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per configuration")
+    parser.add_argument("--send-cost-ms", type=float, default=20.0, help="simulated cost of one session.send")
+    parser.add_argument("--windows", type=int, nargs="+", default=[0, 100, 200, 250])
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f"{'window':>8}{'msgs/s':>10}{'median latency':>18}{'chunks sent':>14}")
+    for window_ms in args.windows:
+        rate, median, sent, total = asyncio.run(run(window_ms, args.duration, args.send_cost_ms / 1000))
+        print(f"{window_ms:>6}ms{rate:>10.1f}{median * 1e3:>16.1f}ms{sent:>8}/{total}")
+
+if __name__ == "__main__":
+    main()
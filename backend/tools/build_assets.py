@@ -0,0 +1,219 @@
+"""
+Build the static site into static/dist for production serving.
+
+- photos in static/images are resized (long edge IMAGE_EDGE px) and
+  converted to WebP
+- every asset gets a content-hashed filename (name.<hash>.ext) so it can be
+  cached as immutable; references in HTML and manifests are rewritten
+- text files get .gz (and .br when the optional brotli package is
+  installed) siblings, kept only when smaller
+- sw.js is generated with a per-build cache name and a precache list
+  taken from the build output
+- asset-manifest.json maps source paths to built paths
+
+Run with: python -m backend.tools.build_assets
+On Heroku it runs at slug compile time, from bin/post_compile.
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+from typing import Dict, List
+from PIL import Image, ImageOps
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SOURCE_DIR = "static"
+OUTPUT_DIR = os.path.join(SOURCE_DIR, "dist")
+URL_PREFIX = "/static/"
+PAGES = ("index.html", "about.html")
+# Generated from scratch, never copied
+SKIP = {"sw.js"}
+PHOTO_DIR = "images"
+PHOTO_TYPES = {".jpg", ".jpeg", ".png"}
+# Photos are shown at most ~400 CSS px wide; this covers 2x screens
+IMAGE_EDGE = 800
+IMAGE_QUALITY = 80
+# Text assets whose references to other assets are rewritten before hashing
+REWRITE_TYPES = {".json", ".webmanifest", ".css", ".js"}
+COMPRESS_TYPES = {".html", ".js", ".json", ".webmanifest", ".svg", ".css", ".txt"}
+# The service worker precaches this page and the assets it references;
+# everything else (photos, the about page's audio) is cached on first use
+PRECACHE_PAGE = "index.html"
+
+SERVICE_WORKER = """// Generated by backend/tools/build_assets.py, do not edit.
+const CACHE_NAME = "ai-sight-%(build)s";
+const PRECACHE = %(precache)s;
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(
+    caches.open(CACHE_NAME)
+      .then((cache) => cache.addAll(PRECACHE))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    caches.keys()
+      .then((names) => Promise.all(
+        names.filter((name) => name !== CACHE_NAME).map((name) => caches.delete(name))
+      ))
+      .then(() => self.clients.claim())
+  );
+});
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (request.method !== "GET" || url.origin !== self.location.origin) return;
+
+  if (url.pathname.startsWith("/static/")) {
+    // Hashed URLs never change: cache first
+    event.respondWith(
+      caches.match(request).then((cached) => cached || fetch(request).then((response) => {
+        if (response.ok) {
+          const copy = response.clone();
+          caches.open(CACHE_NAME).then((cache) => cache.put(request, copy));
+        }
+        return response;
+      }))
+    );
+  } else if (request.mode === "navigate") {
+    // Pages: network first so a deploy shows up, cache as offline fallback
+    event.respondWith(
+      fetch(request).then((response) => {
+        const copy = response.clone();
+        caches.open(CACHE_NAME).then((cache) => cache.put(request, copy));
+        return response;
+      }).catch(() => caches.match(request))
+    );
+  }
+});
+"""
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:10]
+
+def hashed_path(rel_path: str, data: bytes) -> str:
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{content_hash(data)}{ext}"
+
+def optimise_photo(path: str, max_edge: int = IMAGE_EDGE, quality: int = IMAGE_QUALITY) -> bytes:
+    """Upright, downscaled WebP version of a photo."""
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, "WEBP", quality=quality, method=6)
+        return buffer.getvalue()
+
+def rewrite(text: str, mapping: Dict[str, str]) -> str:
+    """Point /static/<source> references at the built files."""
+    # Longest first so e.g. favicon.svg is not rewritten inside favicon.svg.map
+    for source in sorted(mapping, key=len, reverse=True):
+        text = text.replace(URL_PREFIX + source, URL_PREFIX + mapping[source])
+    return text
+
+def precompress(path: str) -> List[str]:
+    """Write .gz/.br siblings of a text file when they save space."""
+    with open(path, "rb") as f:
+        data = f.read()
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data, quality=11)))
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+            written.append(path + suffix)
+    return written
+
+def source_files(source_dir: str, output_dir: str) -> List[str]:
+    # Never copy a previous build into this one: neither the chosen output
+    # nor the default one, which a build with --output leaves stale
+    excluded = {os.path.realpath(output_dir), os.path.realpath(OUTPUT_DIR)}
+    files = []
+    for root, dirs, names in os.walk(source_dir):
+        dirs[:] = [d for d in dirs if os.path.realpath(os.path.join(root, d)) not in excluded]
+        for name in names:
+            rel_path = os.path.relpath(os.path.join(root, name), source_dir).replace(os.sep, "/")
+            if rel_path not in PAGES and rel_path not in SKIP:
+                files.append(rel_path)
+    return sorted(files)
+
+def write(output_dir: str, rel_path: str, data: bytes) -> str:
+    path = os.path.join(output_dir, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+def build(source_dir: str = SOURCE_DIR, output_dir: str = OUTPUT_DIR) -> dict:
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    mapping: Dict[str, str] = {}
+    sizes = {"before": 0, "after": 0}
+
+    files = source_files(source_dir, output_dir)
+    # Binary assets first, then text assets that may reference them
+    files.sort(key=lambda rel_path: os.path.splitext(rel_path)[1].lower() in REWRITE_TYPES)
+    for rel_path in files:
+        path = os.path.join(source_dir, rel_path)
+        root, ext = os.path.splitext(rel_path)
+        with open(path, "rb") as f:
+            data = f.read()
+        sizes["before"] += len(data)
+        if rel_path.startswith(PHOTO_DIR + "/") and ext.lower() in PHOTO_TYPES:
+            data = optimise_photo(path)
+            built = hashed_path(root + ".webp", data)
+        elif ext.lower() in REWRITE_TYPES:
+            data = rewrite(data.decode("utf-8"), mapping).encode("utf-8")
+            built = hashed_path(rel_path, data)
+        else:
+            built = hashed_path(rel_path, data)
+        sizes["after"] += len(data)
+        mapping[rel_path] = built
+        written = write(output_dir, built, data)
+        if ext.lower() in COMPRESS_TYPES:
+            precompress(written)
+
+    build_id = content_hash(json.dumps(mapping, sort_keys=True).encode())
+    precache = ["/"]
+    for page in PAGES:
+        with open(os.path.join(source_dir, page), encoding="utf-8") as f:
+            html = rewrite(f.read(), mapping)
+        precompress(write(output_dir, page, html.encode("utf-8")))
+        if page == PRECACHE_PAGE:
+            precache += [URL_PREFIX + built for built in mapping.values() if URL_PREFIX + built in html]
+    service_worker = SERVICE_WORKER % {"build": build_id, "precache": json.dumps(precache, indent=2)}
+    precompress(write(output_dir, "sw.js", service_worker.encode("utf-8")))
+
+    manifest = {"build": build_id, "assets": mapping}
+    with open(os.path.join(output_dir, "asset-manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    manifest["sizes"] = sizes
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Build hashed, precompressed static assets")
+    parser.add_argument("--source", default=SOURCE_DIR)
+    parser.add_argument("--output", default=OUTPUT_DIR)
+    args = parser.parse_args()
+    manifest = build(args.source, args.output)
+    sizes = manifest["sizes"]
+    print(f"Built {len(manifest['assets'])} assets into {args.output} (build {manifest['build']}): "
+          f"{sizes['before'] / 1024:.0f} KB -> {sizes['after'] / 1024:.0f} KB"
+          f"{'' if brotli else ', brotli not installed so gzip only'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Load generator for the /ws endpoint.
+
+Drives N concurrent synthetic clients that behave like static/index.html:
+binary AUDIO frames of 4096 samples at the browser rate, and a JPEG IMAGE
+frame every 500 ms. Each client alternates speech-like bursts with silence
+and measures time-to-first-audio from the end of a burst to the first audio
+frame of the reply. Server CPU and memory are read from /proc.
+
+Against the local fake Gemini backend:
+
+    python -m backend.tools.loadgen --spawn --clients 50 --duration 60
+
+Against a running server, pass --url and --pid to include its CPU/RSS.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+import cv2
+import numpy as np
+import websockets
+from ..app.models.frame import FrameType
+from ..app.utils.frame_codec import encode_frame
+
+CHUNK_SAMPLES = 4096
+IMAGE_INTERVAL = 0.5
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+def synthetic_frames(count: int = 8, width: int = 640, height: int = 480) -> List[bytes]:
+    """Webcam-sized JPEGs of a few different scenes, like a moving camera."""
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(count):
+        image = np.full((height, width, 3), 90, np.uint8)
+        x, y = (i * 71) % (width - 200), (i * 37) % (height - 150)
+        cv2.rectangle(image, (x, y), (x + 200, y + 150), (40 + i * 25, 200, 120), -1)
+        image = cv2.add(image, rng.integers(0, 12, image.shape, dtype=np.uint8))
+        frames.append(cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 70])[1].tobytes())
+    return frames
+
+def synthetic_audio(rate: int, speech: bool, rng: np.random.Generator) -> bytes:
+    """One chunk of voiced tone (speech) or room noise (silence)."""
+    t = np.arange(CHUNK_SAMPLES) / rate
+    if speech:
+        samples = np.sin(2 * np.pi * 180 * t) * 6000 + rng.normal(0, 300, CHUNK_SAMPLES)
+    else:
+        samples = rng.normal(0, 30, CHUNK_SAMPLES)
+    return samples.astype("<i2").tobytes()
+
+class ProcessSampler:
+    """CPU time and RSS of a process and its direct children, from /proc."""
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK")
+
+    def _pids(self) -> List[int]:
+        pids = [self.pid]
+        try:
+            with open(f"/proc/{self.pid}/task/{self.pid}/children") as f:
+                pids += [int(child) for child in f.read().split()]
+        except OSError:
+            pass
+        return pids
+
+    def sample(self) -> Dict[str, float]:
+        cpu = rss = 0.0
+        for pid in self._pids():
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                cpu += (int(fields[11]) + int(fields[12])) / self.ticks
+                with open(f"/proc/{pid}/status") as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            rss += int(line.split()[1]) * 1024
+            except OSError:
+                continue
+        return {"time": time.monotonic(), "cpu": cpu, "rss": rss}
+
+class Stats:
+    def __init__(self):
+        self.connected = 0
+        self.rejected = 0
+        self.errors = 0
+        self.sent = 0
+        self.received = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.ttfa: List[float] = []
+
+async def run_client(url: str, stats: Stats, duration: float, rate: int, speech: float,
+                     silence: float, frames: List[bytes], seed: int):
+    rng = np.random.default_rng(seed)
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            turn_ended_at: Optional[float] = None
+            ready = asyncio.Event()
+
+            async def receive():
+                nonlocal turn_ended_at
+                async for message in ws:
+                    stats.received += 1
+                    stats.bytes_received += len(message)
+                    if isinstance(message, bytes):
+                        if turn_ended_at is not None:
+                            stats.ttfa.append(time.perf_counter() - turn_ended_at)
+                            turn_ended_at = None
+                        continue
+                    data = json.loads(message)
+                    if data.get("status") == "connected":
+                        stats.connected += 1
+                        ready.set()
+                    elif data.get("error") == "busy":
+                        stats.rejected += 1
+                        ready.set()
+
+            receiver = asyncio.create_task(receive())
+            await asyncio.wait_for(ready.wait(), 30)
+            chunk_seconds = CHUNK_SAMPLES / rate
+            cycle = speech + silence
+            start = time.perf_counter()
+            next_image = start
+            seq = 0
+            was_speaking = False
+            while ws.state is websockets.State.OPEN and not receiver.done():
+                now = time.perf_counter()
+                elapsed = now - start
+                if elapsed >= duration:
+                    break
+                speaking = elapsed % cycle < speech
+                if was_speaking and not speaking:
+                    turn_ended_at = now
+                was_speaking = speaking
+                messages = [encode_frame(FrameType.AUDIO, synthetic_audio(rate, speaking, rng),
+                                         seq, rate, int(elapsed * 1000))]
+                if frames and now >= next_image:
+                    messages.append(encode_frame(FrameType.IMAGE, frames[seq % len(frames)], seq))
+                    next_image += IMAGE_INTERVAL
+                for message in messages:
+                    await ws.send(message)
+                    stats.sent += 1
+                    stats.bytes_sent += len(message)
+                seq += 1
+                # Pace like a real microphone, on an absolute schedule
+                await asyncio.sleep(max(0.0, start + seq * chunk_seconds - time.perf_counter()))
+            receiver.cancel()
+    except Exception as e:
+        stats.errors += 1
+        print(f"client {seed}: {type(e).__name__}: {e}", file=sys.stderr)
+
+def spawn_server(port: int, log_path: Optional[str]) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.setdefault("GEMINI_BACKEND", "fake")
+    log = open(log_path, "wb") if log_path else subprocess.DEVNULL
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--port", str(port),
+         "--log-level", "warning"],
+        env=env, stdout=log, stderr=log,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/stats", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Server did not start within 30 s")
+
+async def run(args) -> dict:
+    frames = [] if args.no_images else synthetic_frames()
+    sampler = ProcessSampler(args.pid) if args.pid else None
+    stats = Stats()
+    before = sampler.sample() if sampler else None
+
+    async def staggered(i: int):
+        await asyncio.sleep(args.ramp * i / max(1, args.clients))
+        await run_client(args.url, stats, args.duration, args.rate, args.speech,
+                         args.silence, frames, i)
+
+    wall_start = time.monotonic()
+    await asyncio.gather(*(staggered(i) for i in range(args.clients)))
+    wall = time.monotonic() - wall_start
+    after = sampler.sample() if sampler else None
+
+    report = {
+        "clients": args.clients,
+        "connected": stats.connected,
+        "rejected": stats.rejected,
+        "errors": stats.errors,
+        "seconds": round(wall, 1),
+        "sent_msgs_per_s": round(stats.sent / wall, 1),
+        "received_msgs_per_s": round(stats.received / wall, 1),
+        "sent_kbytes_per_s": round(stats.bytes_sent / wall / 1024, 1),
+        "received_kbytes_per_s": round(stats.bytes_received / wall / 1024, 1),
+        "turns_measured": len(stats.ttfa),
+        "ttfa_p50_ms": round(percentile(stats.ttfa, 50) * 1000, 1) if stats.ttfa else None,
+        "ttfa_p99_ms": round(percentile(stats.ttfa, 99) * 1000, 1) if stats.ttfa else None,
+    }
+    if sampler:
+        cpu = after["cpu"] - before["cpu"]
+        connection_seconds = max(1, stats.connected) * args.duration
+        cpu_per_connection = cpu / connection_seconds
+        report.update({
+            "server_cpu_percent": round(cpu / (after["time"] - before["time"]) * 100, 1),
+            "server_cpu_ms_per_connection_second": round(cpu_per_connection * 1000, 2),
+            "server_rss_mb": round(after["rss"] / 2**20, 1),
+            "server_rss_kb_per_connection": round((after["rss"] - before["rss"]) / 1024 / max(1, stats.connected), 1),
+            # Connections one core could carry at this per-connection cost
+            "sessions_per_core_estimate": int(1 / cpu_per_connection) if cpu_per_connection else None,
+        })
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="WebSocket URL (default ws://127.0.0.1:PORT/ws?lang=en)")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="seconds each client streams")
+    parser.add_argument("--ramp", type=float, default=5, help="seconds over which clients connect")
+    parser.add_argument("--rate", type=int, default=48000, help="client microphone sample rate")
+    parser.add_argument("--speech", type=float, default=2.0, help="seconds of speech per turn")
+    parser.add_argument("--silence", type=float, default=3.0, help="seconds of silence per turn")
+    parser.add_argument("--no-images", action="store_true", help="send audio only")
+    parser.add_argument("--pid", type=int, default=None, help="server PID for CPU/RSS readings")
+    parser.add_argument("--spawn", action="store_true", help="start a server with GEMINI_BACKEND=fake")
+    parser.add_argument("--server-log", default=None, help="write the spawned server's output here")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+    args.url = args.url or f"ws://127.0.0.1:{args.port}/ws?lang=en"
+
+    server = None
+    if args.spawn:
+        server = spawn_server(urlparse(args.url).port or args.port, args.server_log)
+        args.pid = server.pid
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=60)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print(f"{key:>38}: {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Replay a session recording made with RECORD_DIR set.
+
+Modes:
+  --info     summarise the recording (records per kind, bytes, duration)
+  (default)  send the client's messages to a running /ws endpoint with the
+             original timing (--speed 1), scaled (--speed 2), or as fast as
+             possible (--speed 0), and report how much later (or earlier)
+             replies start than they did in the recording
+  --ingest   feed the client's messages through dispatch_input in-process,
+             without a server or Gemini, and report ingest cost per kind
+
+    python -m backend.tools.replay recordings/20250101-120000-ab12cd34.rec --speed 1
+    python -m backend.tools.replay session.rec --ingest --speed 0 --start 30
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List
+import websockets
+from ..app.api.websocket import dispatch_input
+from ..app.core.constant import AUDIO_INPUT_SAMPLE_RATE
+from ..app.models.record import RecordKind
+from ..app.services.connection import ConnectionManager
+from ..app.services.recorder import RecordingReader
+from ..app.utils.frame_codec import decode_frame, loads
+from .loadgen import percentile
+
+# Audio after this many seconds of none starts a new reply
+REPLY_GAP = 0.5
+
+async def pace(started: float, t_us: int, offset_us: int, speed: float):
+    """Sleep until a record is due, relative to the replay start."""
+    if speed > 0:
+        due = started + (t_us - offset_us) / 1e6 / speed
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+def client_records(reader: RecordingReader, start: int):
+    return (record for record in reader.records(start) if record.kind.from_client)
+
+def info(reader: RecordingReader):
+    counts: Counter = Counter()
+    sizes: Counter = Counter()
+    for record in reader:
+        counts[record.kind.name] += 1
+        sizes[record.kind.name] += len(record.payload)
+    print(f"{reader.path}: {len(reader)} records over {reader.duration:.1f}s, meta {reader.meta()}")
+    for kind in counts:
+        print(f"{kind:>16}: {counts[kind]:>7} records {sizes[kind]:>12} bytes")
+
+def reply_onsets(times: List[float], gap: float = REPLY_GAP) -> List[float]:
+    """Start times of replies: audio arriving after `gap` seconds without audio."""
+    onsets = []
+    previous = None
+    for t in times:
+        if previous is None or t - previous > gap:
+            onsets.append(t)
+        previous = t
+    return onsets
+
+async def replay_to_server(reader: RecordingReader, url: str, speed: float, start: int) -> dict:
+    """
+    Send the recorded client traffic to /ws and compare when replies start
+    with when they started in the recording (scaled by `speed`).
+    """
+    audio_times: List[float] = []
+    received = sent = 0
+    offset_us = int(reader.index["t_us"][start]) if start < len(reader) else 0
+
+    async with websockets.connect(url, max_size=None) as ws:
+        started = time.perf_counter()
+
+        async def receive():
+            nonlocal received
+            async for message in ws:
+                received += 1
+                if isinstance(message, bytes):
+                    audio_times.append(time.perf_counter() - started)
+
+        receiver = asyncio.create_task(receive())
+        for record in client_records(reader, start):
+            await pace(started, record.t_us, offset_us, speed)
+            if record.kind == RecordKind.CLIENT_BINARY:
+                await ws.send(bytes(record.payload))
+            else:
+                await ws.send(str(record.payload, "utf-8"))
+            sent += 1
+        elapsed = time.perf_counter() - started
+        # Give the last reply a chance to arrive
+        await asyncio.sleep(3)
+        receiver.cancel()
+
+    report = {
+        "sent": sent,
+        "received": received,
+        "seconds": round(elapsed, 2),
+        "sent_msgs_per_s": round(sent / elapsed, 1) if elapsed else None,
+    }
+    replayed = reply_onsets(audio_times)
+    recorded = reply_onsets([(record.t_us - offset_us) / 1e6 for record in reader.records(start)
+                             if record.kind == RecordKind.MODEL_AUDIO])
+    report["replies"] = len(replayed)
+    report["recorded_replies"] = len(recorded)
+    if speed > 0 and replayed and recorded:
+        # Positive: replies now start later than they did in the recording
+        shifts = [replay - rec / speed for replay, rec in zip(replayed, recorded)]
+        report["reply_shift_p50_ms"] = round(percentile(shifts, 50) * 1000, 1)
+        report["reply_shift_p99_ms"] = round(percentile(shifts, 99) * 1000, 1)
+    return report
+
+async def replay_ingest(reader: RecordingReader, speed: float, start: int) -> dict:
+    """Run the recorded client traffic through dispatch_input in this process."""
+    manager = ConnectionManager()
+    # Measure the full per-frame cost instead of holding frames for bursts
+    manager.burst.enabled = False
+    costs: Dict[str, List[float]] = defaultdict(list)
+    errors = 0
+    started = time.perf_counter()
+    offset_us = int(reader.index["t_us"][start]) if start < len(reader) else 0
+    for record in client_records(reader, start):
+        await pace(started, record.t_us, offset_us, speed)
+        began = time.perf_counter()
+        try:
+            if record.kind == RecordKind.CLIENT_BINARY:
+                frame = decode_frame(bytes(record.payload))
+                kind = frame.type.value
+                await dispatch_input(manager, frame.type, frame.payload,
+                                     frame.sample_rate or AUDIO_INPUT_SAMPLE_RATE)
+            else:
+                data = loads(bytes(record.payload))
+                kind = str(data.get("type"))
+                await dispatch_input(manager, data.get("type"), data.get("data"),
+                                     int(data.get("sampleRate") or AUDIO_INPUT_SAMPLE_RATE))
+        except Exception:
+            errors += 1
+            continue
+        costs[kind].append(time.perf_counter() - began)
+        # Nothing consumes the scheduler here
+        manager.input_queue.clear()
+
+    report = {"seconds": round(time.perf_counter() - started, 2), "errors": errors}
+    for kind, values in costs.items():
+        report[kind] = {
+            "messages": len(values),
+            "p50_us": round(percentile(values, 50) * 1e6, 1),
+            "p99_us": round(percentile(values, 99) * 1e6, 1),
+            "total_ms": round(sum(values) * 1000, 1),
+        }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", help="path to a .rec file")
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/ws", help="/ws endpoint to replay against")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = original timing, 0 = as fast as possible")
+    parser.add_argument("--start", type=float, default=0.0, help="seconds into the recording to start from")
+    parser.add_argument("--info", action="store_true", help="only summarise the recording")
+    parser.add_argument("--ingest", action="store_true", help="replay through dispatch_input in-process")
+    args = parser.parse_args()
+
+    reader = RecordingReader(args.recording)
+    if args.info:
+        info(reader)
+        return
+    start = reader.seek(args.start)
+    if args.ingest:
+        logging.disable(logging.INFO)
+        report = asyncio.run(replay_ingest(reader, args.speed, start))
+    else:
+        url = args.url
+        meta = reader.meta() or {}
+        if meta.get("query") and "?" not in url:
+            url += "?" + meta["query"]
+        report = asyncio.run(replay_to_server(reader, url, args.speed, start))
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
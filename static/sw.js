@@ -1,27 +1,12 @@
-const CACHE_NAME = "ai-sight-cache-v1";
-const urlsToCache = [
-  "/static/index.html",
-  "/static/sounds/success.mp3",
-  "/static/sounds/error.mp3",
-  "/static/sounds/notification.mp3",
-  "/static/sounds/connect.mp3",
-  "/static/sounds/disconnect.mp3",
-  "/static/sounds/gesture.mp3",
-  "/static/sounds/startListening.mp3",
-  "/static/sounds/stopListening.mp3",
-  "/static/sounds/alert.mp3",
-];
+// Development service worker: no caching, so edits show up on reload.
+// `python -m backend.tools.build_assets` generates the production worker
+// (static/dist/sw.js) with a per-build cache and precache list.
+self.addEventListener("install", () => self.skipWaiting());
 
-self.addEventListener("install", (event) => {
+self.addEventListener("activate", (event) => {
   event.waitUntil(
-    caches.open(CACHE_NAME).then((cache) => cache.addAll(urlsToCache))
-  );
-});
-
-self.addEventListener("fetch", (event) => {
-  event.respondWith(
-    caches
-      .match(event.request)
-      .then((response) => response || fetch(event.request))
+    caches.keys()
+      .then((names) => Promise.all(names.map((name) => caches.delete(name))))
+      .then(() => self.clients.claim())
   );
 });
@@ -0,0 +1,56 @@
+import asyncio
+
+from backend.app.core.constant import SAMPLE_RATE
+from backend.app.services.audio_stream import FramedAudioStream
+from backend.app.utils.audio_codec import DownstreamEncoder
+from backend.app.utils.frame_codec import FRAME_HEADER
+
+FRAME_MS = 20
+FRAME_BYTES = SAMPLE_RATE * FRAME_MS // 1000 * 2
+
+
+def make_stream(sent):
+    async def send(message):
+        sent.append(FRAME_HEADER.unpack_from(message) + (len(message) - FRAME_HEADER.size,))
+
+    return FramedAudioStream(send, DownstreamEncoder(), frame_ms=FRAME_MS, jitter_ms=0, lead_ms=1000)
+
+
+def test_audio_is_cut_into_sequenced_frames():
+    async def scenario():
+        sent = []
+        stream = make_stream(sent)
+        task = asyncio.ensure_future(stream.run())
+        stream.push(bytes(FRAME_BYTES * 2 + 100))
+        stream.end_turn()
+        stream.push(bytes(FRAME_BYTES))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return sent
+
+    sent = asyncio.run(scenario())
+    # (version, type, turn, seq, sample rate, offset in ms, payload size)
+    assert [(flags, seq, offset, size) for _, _, flags, seq, _, offset, size in sent] == [
+        (1, 0, 0, FRAME_BYTES),
+        (1, 1, FRAME_MS, FRAME_BYTES),
+        (1, 2, 2 * FRAME_MS, 100),
+        (2, 3, 0, FRAME_BYTES),
+    ]
+
+
+def test_cancel_drops_unsent_frames_without_a_sequence_gap():
+    async def scenario():
+        sent = []
+        stream = make_stream(sent)
+        stream.push(bytes(FRAME_BYTES * 3))
+        dropped = stream.cancel()
+        task = asyncio.ensure_future(stream.run())
+        stream.push(bytes(FRAME_BYTES))
+        stream.end_turn()
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return sent, dropped
+
+    sent, dropped = asyncio.run(scenario())
+    assert dropped == 3
+    assert [(flags, seq) for _, _, flags, seq, *_ in sent] == [(2, 0)]
@@ -0,0 +1,52 @@
+import asyncio
+
+import cv2
+import numpy as np
+
+from backend.app.utils.image_processing import BurstSelector
+
+rng = np.random.default_rng(0)
+_noise = (rng.random((60, 80, 3)) * 255).astype(np.uint8)
+_sharp = cv2.resize(_noise, (640, 480), interpolation=cv2.INTER_NEAREST)
+SHARP = cv2.imencode(".jpg", _sharp)[1].tobytes()
+BLURRY = cv2.imencode(".jpg", cv2.GaussianBlur(_sharp, (21, 21), 8))[1].tobytes()
+
+
+def run_selector(groups):
+    """Submit each group of frames back to back, 0.3 s apart."""
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        forwarded = []
+
+        async def forward(image_bytes, image_type):
+            forwarded.append((image_bytes, loop.time() - started))
+
+        selector = BurstSelector(forward, window_ms=100, enabled=True)
+        for group in groups:
+            for image_bytes in group:
+                await selector.submit(image_bytes, "image/jpeg")
+            await asyncio.sleep(0.3)
+        return forwarded, selector
+
+    return asyncio.run(scenario())
+
+
+def test_lone_frames_are_forwarded_at_once():
+    forwarded, selector = run_selector([[BLURRY], [BLURRY]])
+    assert [image for image, _ in forwarded] == [BLURRY, BLURRY]
+    assert forwarded[0][1] < 0.05
+    assert selector.bursts == 0
+
+
+def test_a_sharper_frame_in_the_burst_follows_the_lead():
+    forwarded, selector = run_selector([[BLURRY, SHARP, BLURRY]])
+    assert [image for image, _ in forwarded] == [BLURRY, SHARP]
+    assert forwarded[0][1] < 0.05
+    assert selector.bursts == 1 and selector.dropped == 1
+
+
+def test_nothing_follows_a_lead_that_is_already_the_best():
+    forwarded, selector = run_selector([[SHARP, BLURRY, BLURRY]])
+    assert [image for image, _ in forwarded] == [SHARP]
+    assert selector.dropped == 2
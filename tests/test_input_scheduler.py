@@ -0,0 +1,122 @@
+import asyncio
+
+from backend.app.models.input_type import InputType
+from backend.app.services.input_scheduler import InputScheduler
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_text_goes_first_after_the_latest_frame():
+    async def scenario():
+        queue = InputScheduler()
+        queue.put(InputType.AUDIO, "a1")
+        queue.put(InputType.IMAGE, "old frame")
+        queue.put(InputType.IMAGE, "new frame")
+        queue.put(InputType.TEXT, "what is this")
+        return [await queue.get() for _ in range(3)], queue.superseded
+
+    order, superseded = run(scenario())
+    assert order == [
+        (InputType.IMAGE, "new frame"),
+        (InputType.TEXT, "what is this"),
+        (InputType.AUDIO, "a1"),
+    ]
+    assert superseded == 1
+
+
+def test_audio_backlog_drops_the_oldest_chunk():
+    async def scenario():
+        queue = InputScheduler(max_audio=2)
+        for chunk in ("a1", "a2", "a3"):
+            queue.put(InputType.AUDIO, chunk)
+        return await queue.get_batch(0), await queue.get_batch(0), queue.dropped
+
+    first, second, dropped = run(scenario())
+    assert first == (InputType.AUDIO, ["a2"])
+    assert second == (InputType.AUDIO, ["a3"])
+    assert dropped == 1
+
+
+def test_batch_collects_audio_for_the_window_and_appends_the_frame():
+    async def scenario():
+        queue = InputScheduler()
+
+        async def feed():
+            for i in range(3):
+                queue.put(InputType.AUDIO, i)
+                await asyncio.sleep(0.01)
+            queue.put(InputType.IMAGE, "frame")
+
+        feeder = asyncio.ensure_future(feed())
+        batch = await queue.get_batch(0.2)
+        await feeder
+        return batch
+
+    assert run(scenario()) == (InputType.AUDIO, [0, 1, 2, "frame"])
+
+
+def test_text_cuts_an_audio_batch_short():
+    async def scenario():
+        queue = InputScheduler()
+        queue.put(InputType.AUDIO, "a1")
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.02, queue.put, InputType.TEXT, "hello")
+        started = loop.time()
+        batch = await queue.get_batch(5)
+        return batch, loop.time() - started, await queue.get()
+
+    batch, elapsed, text = run(scenario())
+    assert batch == (InputType.AUDIO, ["a1"])
+    assert elapsed < 1
+    assert text == (InputType.TEXT, "hello")
+
+
+def test_flush_sends_the_batch_being_collected():
+    async def scenario():
+        queue = InputScheduler()
+        queue.put(InputType.AUDIO, "a1")
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.02, queue.put, InputType.AUDIO, "a2")
+        loop.call_later(0.04, queue.flush)
+        started = loop.time()
+        batch = await queue.get_batch(5)
+        return batch, loop.time() - started
+
+    batch, elapsed = run(scenario())
+    assert batch == (InputType.AUDIO, ["a1", "a2"])
+    assert elapsed < 1
+
+
+def test_flush_of_queued_audio_applies_to_the_next_batch():
+    async def scenario():
+        queue = InputScheduler()
+        queue.put(InputType.AUDIO, "tail")
+        queue.flush()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        batch = await queue.get_batch(5)
+        return batch, loop.time() - started
+
+    batch, elapsed = run(scenario())
+    assert batch == (InputType.AUDIO, ["tail"])
+    assert elapsed < 1
+
+
+def test_idle_flush_does_not_cut_the_next_batch():
+    async def scenario():
+        queue = InputScheduler()
+        queue.flush()
+
+        async def feed():
+            for i in range(3):
+                queue.put(InputType.AUDIO, i)
+                await asyncio.sleep(0.01)
+
+        feeder = asyncio.ensure_future(feed())
+        batch = await queue.get_batch(0.2)
+        await feeder
+        return batch
+
+    assert run(scenario()) == (InputType.AUDIO, [0, 1, 2])
@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+
+from backend.app.services.response_cache import CachedResponse, ResponseCache
+from backend.app.utils.image_processing import frame_fingerprint
+
+PROMPT = "Describe the scene"
+
+
+def sign(word: str) -> bytes:
+    image = np.full((480, 640, 3), (90, 120, 140), np.uint8)
+    cv2.rectangle(image, (200, 150), (440, 330), (240, 240, 240), -1)
+    cv2.putText(image, word, (215, 265), cv2.FONT_HERSHEY_SIMPLEX, 2, (20, 20, 20), 5)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+def cache_reply(cache: ResponseCache, image: bytes) -> CachedResponse:
+    frame_hash, thumbnail = frame_fingerprint(image)
+    response = CachedResponse(frame_hash, thumbnail, [b"\0" * 480], ["a sign"])
+    cache.put(PROMPT, "en", response)
+    return response
+
+
+def test_same_scene_hits():
+    cache = ResponseCache()
+    response = cache_reply(cache, sign("PUSH"))
+    assert cache.get(*frame_fingerprint(sign("PUSH")), PROMPT, "en") is response
+    assert cache.get(*frame_fingerprint(sign("PUSH")), "Describe the scene!", "en") is None
+
+
+def test_matching_hash_with_different_details_misses():
+    cache = ResponseCache()
+    cache_reply(cache, sign("PUSH"))
+    push_hash, _ = frame_fingerprint(sign("PUSH"))
+    pull_hash, pull_thumbnail = frame_fingerprint(sign("PULL"))
+    assert push_hash == pull_hash
+    assert cache.get(pull_hash, pull_thumbnail, PROMPT, "en") is None
+
+
+def test_low_information_frames_are_not_cached():
+    cache = ResponseCache()
+    dark = cv2.imencode(".jpg", np.zeros((480, 640, 3), np.uint8))[1].tobytes()
+    cache_reply(cache, dark)
+    assert len(cache) == 0
+    assert cache.get(*frame_fingerprint(dark), PROMPT, "en") is None
+    assert not cache.informative(*frame_fingerprint(dark))
@@ -0,0 +1,82 @@
+import asyncio
+import contextlib
+from types import SimpleNamespace
+
+from backend.app.services.session_pool import LiveSessionPool
+
+
+class FakeSocket:
+    close_code = None
+
+
+class FakeSession:
+    def __init__(self):
+        self._ws = FakeSocket()
+
+
+def fake_client():
+    opened = []
+
+    @contextlib.asynccontextmanager
+    async def connect(model, config):
+        session = FakeSession()
+        opened.append(session)
+        yield session
+
+    live = SimpleNamespace(connect=connect)
+    return SimpleNamespace(aio=SimpleNamespace(live=live)), opened
+
+
+def test_checkout_is_a_hit_once_prewarmed():
+    async def scenario():
+        client, opened = fake_client()
+        pool = LiveSessionPool(client, {"en": {}}, size=1, check_interval=0.05)
+        pool.start()
+        await asyncio.sleep(0.02)
+        first = await pool.checkout("en")
+        await asyncio.sleep(0.02)
+        second = await pool.checkout("en")
+        await pool.close()
+        return first, second, pool.stats()
+
+    first, second, stats = asyncio.run(scenario())
+    assert first is not second
+    assert stats["hits"] == 2 and stats["misses"] == 0
+
+
+def test_checked_in_session_is_reused_up_to_max_uses():
+    async def scenario():
+        client, opened = fake_client()
+        pool = LiveSessionPool(client, {"tts": {}}, size=1, max_uses=2, check_interval=0.05)
+        pool.start()
+        await asyncio.sleep(0.02)
+        sessions = []
+        for _ in range(3):
+            pooled = await pool.checkout("tts")
+            sessions.append(pooled.session)
+            # Give the maintenance task a chance to refill while checked out
+            await asyncio.sleep(0.02)
+            pool.checkin(pooled)
+        await pool.close()
+        return sessions, len(opened)
+
+    sessions, opened = asyncio.run(scenario())
+    assert sessions[0] is sessions[1]
+    assert sessions[2] is not sessions[0]
+    assert opened == 2
+
+
+def test_closed_socket_is_not_handed_out():
+    async def scenario():
+        client, opened = fake_client()
+        pool = LiveSessionPool(client, {"en": {}}, size=1, check_interval=10)
+        pool.start()
+        await asyncio.sleep(0.02)
+        opened[0]._ws.close_code = 1011
+        pooled = await pool.checkout("en")
+        await pool.close()
+        return pooled.session, opened, pool.stats()
+
+    session, opened, stats = asyncio.run(scenario())
+    assert session is opened[1]
+    assert stats["expired"] == 1 and stats["misses"] == 1
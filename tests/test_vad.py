@@ -0,0 +1,71 @@
+import numpy as np
+
+from backend.app.models.speech_event import SpeechEvent
+from backend.app.utils.audio_processing import VoiceActivityDetector
+
+RATE = 16000
+
+
+def tone(ms: int, amplitude: int = 10000) -> np.ndarray:
+    t = np.arange(RATE * ms // 1000) / RATE
+    return (np.sin(2 * np.pi * 200 * t) * amplitude).astype(np.int16)
+
+
+def silence(ms: int) -> np.ndarray:
+    return np.zeros(RATE * ms // 1000, dtype=np.int16)
+
+
+def make_vad(**kwargs) -> VoiceActivityDetector:
+    options = dict(sample_rate=RATE, hangover_ms=100, preroll_ms=60)
+    options.update(kwargs)
+    return VoiceActivityDetector(**options)
+
+
+def test_silence_is_held_back():
+    vad = make_vad()
+    chunks, event = vad.process(silence(40))
+    assert chunks == [] and event is None
+    assert vad.chunks_suppressed == 1
+    assert not vad.speaking
+
+
+def test_speech_start_releases_the_preroll():
+    vad = make_vad()
+    for _ in range(5):
+        vad.process(silence(20))
+    chunks, event = vad.process(tone(40))
+    assert event == SpeechEvent.START
+    assert vad.speaking
+    # Preroll is capped at 60 ms of the held silence, then the speech chunk
+    assert sum(len(chunk) for chunk in chunks[:-1]) == RATE * 60 // 1000
+    assert len(chunks[-1]) == RATE * 40 // 1000
+
+
+def test_speech_end_after_the_hangover():
+    vad = make_vad()
+    assert vad.process(tone(40))[1] == SpeechEvent.START
+    # Silence shorter than the hangover is still forwarded, without an event
+    chunks, event = vad.process(silence(60))
+    assert event is None and len(chunks) == 1
+    chunks, event = vad.process(silence(60))
+    assert event == SpeechEvent.END and len(chunks) == 1
+    assert not vad.speaking
+
+
+def test_onset_delay_and_longest_speech_run():
+    vad = make_vad()
+    _, event = vad.process(np.concatenate([silence(60), tone(40)]))
+    assert event == SpeechEvent.START
+    assert vad.onset_delay_ms == 40
+    assert vad.longest_speech_ms == 40
+    vad.process(tone(100))
+    assert vad.longest_speech_ms == 140
+    # A gap restarts the run; the longest one is kept
+    vad.process(np.concatenate([silence(20), tone(60)]))
+    assert vad.longest_speech_ms == 140
+
+
+def test_quiet_noise_is_not_speech():
+    vad = make_vad()
+    chunks, event = vad.process(tone(100, amplitude=50))
+    assert event is None and chunks == []